@@ -17,13 +17,16 @@ import logging
 import queue
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Callable, Optional, List, Set
-from dataclasses import dataclass
 from enum import Enum
 from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
+# 线程池异步发布时队列满的最长等待时间（秒），超时丢弃，总线停止后池线程不会一直阻塞
+_ASYNC_PUT_TIMEOUT = 1.0
+
 
 class EventType(Enum):
     """事件类型"""
@@ -76,15 +79,29 @@ class EventPriority(Enum):
     LOW = 3
 
 
-@dataclass
 class Event:
-    """事件"""
-    event_type: EventType
-    data: Dict[str, Any]
-    timestamp: float
-    source: str
-    priority: EventPriority = EventPriority.NORMAL
-    correlation_id: Optional[str] = None
+    """
+    事件
+    
+    使用 __slots__ 而非 dataclass：无实例 __dict__，属性访问更快，
+    且不生成热路径用不到的 __eq__/__repr__（嵌入式平台需兼容 Python 3.8，
+    无法使用 dataclass(slots=True)）。
+    """
+    __slots__ = ("event_type", "data", "timestamp", "source", "priority", "correlation_id")
+    
+    def __init__(self,
+                 event_type: EventType,
+                 data: Dict[str, Any],
+                 timestamp: float,
+                 source: str,
+                 priority: EventPriority = EventPriority.NORMAL,
+                 correlation_id: Optional[str] = None):
+        self.event_type = event_type
+        self.data = data
+        self.timestamp = timestamp  # 秒（time.time）
+        self.source = source
+        self.priority = priority
+        self.correlation_id = correlation_id
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -105,9 +122,9 @@ class PriorityQueue(queue.PriorityQueue):
         self.counter = 0
     
     def put(self, item, block=True, timeout=None):
-        """添加事件到队列"""
-        priority, _, event = item
-        super().put((priority, time.time(), self.counter, event), block, timeout)
+        """添加事件到队列（item 为 (优先级, 单调时钟纳秒, 事件)，同优先级按入队先后排序）"""
+        priority, order, event = item
+        super().put((priority, order, self.counter, event), block, timeout)
         self.counter += 1
     
     def get(self, block=True, timeout=None):
@@ -148,14 +165,26 @@ class EnhancedEventBus:
         self.running = False
         self.worker_thread: Optional[threading.Thread] = None
         
-        # 统计信息
+        # 异步发布线程池（首次 publish_async 时创建，复用线程）
+        self._async_pool: Optional[ThreadPoolExecutor] = None
+        self._async_pool_lock = threading.Lock()
+        self._async_closed = False  # stop() 之后为True，直到再次 start()
+        
+        # 统计信息（events_processed 仅由工作线程写入）
         self.stats = {
-            "events_published": 0,
             "events_processed": 0,
-            "events_dropped": 0,
-            "events_by_type": defaultdict(int)
+            "events_dropped": 0
         }
         
+        # 发布总数归工作线程所有：出队时计数，加上当前队列长度即为已发布数
+        self._dequeued = 0
+        
+        # 按事件类型计数：入队成功时计数（含尚在队列中的事件），以枚举序号为下标的预分配数组，
+        # 避免每次发布做字符串哈希；发布可能来自多个线程，计数在锁内更新
+        self._et_index: Dict[EventType, int] = {et: i for i, et in enumerate(EventType)}
+        self._counts: List[int] = [0] * len(self._et_index)
+        self._counts_lock = threading.Lock()
+        
         # 事件追踪
         self.event_history: List[Event] = []
         self.max_history = 100
@@ -210,7 +239,8 @@ class EnhancedEventBus:
                 data: Dict[str, Any],
                 source: str = "unknown",
                 priority: EventPriority = EventPriority.NORMAL,
-                correlation_id: Optional[str] = None):
+                correlation_id: Optional[str] = None,
+                timeout: Optional[float] = None):
         """
         发布事件
         
@@ -220,6 +250,7 @@ class EnhancedEventBus:
             source: 事件源
             priority: 优先级
             correlation_id: 关联ID
+            timeout: 队列满时的最长等待时间（秒），None表示一直等待，超时后丢弃事件
         """
         event = Event(
             event_type=event_type,
@@ -239,17 +270,38 @@ class EnhancedEventBus:
         
         # 添加到队列
         try:
-            self.event_queue.put((priority.value, time.time(), event))
-            self.stats["events_published"] += 1
-            self.stats["events_by_type"][event_type.value] += 1
+            # 队列排序用单调时钟（整数纳秒，不受系统时间调整影响）
+            self.event_queue.put((priority.value, time.monotonic_ns(), event), timeout=timeout)
+            with self._counts_lock:
+                self._counts[self._et_index[event_type]] += 1
             logger.debug(f"📡 发布事件: {event_type.value} from {source}")
         except queue.Full:
             logger.error(f"❌ 事件队列已满，丢弃事件: {event_type.value}")
             self.stats["events_dropped"] += 1
     
     def publish_async(self, *args, **kwargs):
-        """异步发布事件"""
-        threading.Thread(target=self.publish, args=args, kwargs=kwargs, daemon=True).start()
+        """异步发布事件（提交到总线自有的线程池，不再逐次创建线程；总线停止后丢弃）"""
+        with self._async_pool_lock:
+            if self._async_closed:
+                logger.warning("⚠️ 事件总线已停止，丢弃异步发布的事件")
+                return
+            if self._async_pool is None:
+                self._async_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bus-async")
+            self._async_pool.submit(self._publish_pooled, args, kwargs)
+    
+    def _publish_pooled(self, args: tuple, kwargs: Dict[str, Any]):
+        """
+        在线程池中执行的发布：总线停止后放弃尚未执行的任务，队列满时限时等待
+        
+        Args:
+            args: publish 的位置参数
+            kwargs: publish 的关键字参数
+        """
+        if self._async_closed:
+            logger.debug("📡 事件总线已停止，放弃排队中的异步发布")
+            return
+        kwargs.setdefault("timeout", _ASYNC_PUT_TIMEOUT)
+        self.publish(*args, **kwargs)
     
     def start(self):
         """启动事件总线"""
@@ -258,6 +310,8 @@ class EnhancedEventBus:
             return
         
         self.running = True
+        with self._async_pool_lock:
+            self._async_closed = False
         self.worker_thread = threading.Thread(target=self._worker, daemon=True)
         self.worker_thread.start()
         logger.info("📡 增强版事件总线已启动")
@@ -274,6 +328,13 @@ class EnhancedEventBus:
         
         self.running = False
         
+        # 与 publish_async 互斥：停止后不会再有提交到已关闭线程池的任务
+        with self._async_pool_lock:
+            self._async_closed = True
+            if self._async_pool is not None:
+                self._async_pool.shutdown(wait=False)
+                self._async_pool = None
+        
         if self.worker_thread:
             self.worker_thread.join(timeout=timeout)
         
@@ -284,42 +345,72 @@ class EnhancedEventBus:
     
     def _worker(self):
         """工作线程"""
+        event_queue = self.event_queue
         while self.running:
             try:
-                # 从队列获取事件
-                event = self.event_queue.get(timeout=1.0)
+                # 阻塞等待第一个事件
+                event = event_queue.get(timeout=1.0)
                 
-                # 添加到历史
-                self.event_history.append(event)
-                if len(self.event_history) > self.max_history:
-                    self.event_history.pop(0)
-                
-                # 分发给订阅者
-                if event.event_type in self.subscribers:
-                    for priority, handler in self.subscribers[event.event_type]:
-                        try:
-                            handler(event)
-                        except Exception as e:
-                            logger.error(f"⚠️ 事件处理失败: {event.event_type.value} - {e}")
-                
-                self.stats["events_processed"] += 1
+                # 批量取空队列，摊薄每次唤醒的加锁开销
+                while True:
+                    self._dispatch(event)
+                    try:
+                        event = event_queue.get_nowait()
+                    except queue.Empty:
+                        break
                 
             except queue.Empty:
                 continue
             except Exception as e:
                 logger.error(f"⚠️ 事件总线错误: {e}")
     
+    def _dispatch(self, event: Event):
+        """
+        分发单个事件
+        
+        Args:
+            event: 事件
+        """
+        self._dequeued += 1
+        
+        # 添加到历史
+        self.event_history.append(event)
+        if len(self.event_history) > self.max_history:
+            self.event_history.pop(0)
+        
+        # 分发给订阅者
+        if event.event_type in self.subscribers:
+            for priority, handler in self.subscribers[event.event_type]:
+                try:
+                    handler(event)
+                except Exception as e:
+                    logger.error(f"⚠️ 事件处理失败: {event.event_type.value} - {e}")
+        
+        self.stats["events_processed"] += 1
+    
     def get_stats(self) -> Dict[str, Any]:
-        """获取统计信息"""
+        """
+        获取统计信息
+        
+        已发布数 = 工作线程已出队数 + 当前队列长度；
+        按类型计数在发布入队时累加，包含尚未处理的事件。
+        """
+        queue_size = self.event_queue.qsize()
         return {
-            "events_published": self.stats["events_published"],
+            "events_published": self._dequeued + queue_size,
             "events_processed": self.stats["events_processed"],
             "events_dropped": self.stats["events_dropped"],
-            "events_by_type": dict(self.stats["events_by_type"]),
+            "events_by_type": self._events_by_type(),
             "subscribers_count": sum(len(handlers) for handlers in self.subscribers.values()),
-            "queue_size": self.event_queue.qsize()
+            "queue_size": queue_size
         }
     
+    def _events_by_type(self) -> Dict[str, int]:
+        """按事件类型汇总计数（仅包含非零项）"""
+        with self._counts_lock:
+            counts = list(self._counts)
+        return {et.value: counts[i] for et, i in self._et_index.items() if counts[i]}
+    
     def _print_stats(self):
         """打印统计信息"""
         stats = self.get_stats()
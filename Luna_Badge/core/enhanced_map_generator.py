@@ -8,8 +8,12 @@ Luna Badge 增强地图生成器
 
 import cv2
 import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+import copy
 import json
 import os
+import re
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import logging
@@ -17,17 +21,130 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# 节点分类规则（按优先级排列）：每类关键词预编译为一个正则，单次扫描即可判定
+_NODE_TYPE_RULES: Tuple[Tuple["re.Pattern[str]", str, str], ...] = (
+    (re.compile("地铁|subway|metro|公交|bus|站", re.IGNORECASE), "transit", "outdoor"),
+    (re.compile("洗手间|toilet|卫生间|wc|电梯|elevator|扶梯|escalator"
+                "|医院|hospital|商场|mall|超市|supermarket", re.IGNORECASE), "facility", "indoor"),
+    (re.compile("室|room|office|病房|科室", re.IGNORECASE), "indoor", "indoor"),
+    (re.compile("口|entrance|exit|走廊|corridor|过道", re.IGNORECASE), "walkway", "indoor"),
+    (re.compile("桥|bridge|道|路|road|街|street", re.IGNORECASE), "walkway", "outdoor"),
+)
+
+# 公共设施规则（按优先级排列）：关键词正则 -> 设施信息
+_FACILITY_RULES: Tuple[Tuple["re.Pattern[str]", Dict[str, Any]], ...] = (
+    # 洗手间信息
+    (re.compile("洗手间|toilet|卫生间", re.IGNORECASE), {
+        "type": "restroom",
+        "available": True,
+        "accessibility": "wheelchair_accessible"
+    }),
+    # 电梯信息
+    (re.compile("电梯|elevator", re.IGNORECASE), {
+        "type": "elevator",
+        "capacity": "13人",
+        "accessibility": "wheelchair_accessible"
+    }),
+    # 医院信息
+    (re.compile("医院|hospital", re.IGNORECASE), {
+        "type": "hospital",
+        "services": ["emergency", "consultation"],
+        "hours": "24小时"
+    }),
+    # 商场信息
+    (re.compile("商场|mall", re.IGNORECASE), {
+        "type": "shopping_mall",
+        "services": ["shopping", "dining", "parking"],
+        "hours": "10:00-22:00"
+    }),
+)
+
+# 公共交通关键词
+_SUBWAY_RE = re.compile("地铁|subway|metro", re.IGNORECASE)
+_BUS_RE = re.compile("公交|bus", re.IGNORECASE)
+_STATION_RE = re.compile("站")
+_LINE_RE = re.compile(r"\d+")
+
+# 方向描述中的距离（米）
+_DIST_RE = re.compile(r"\d+")
+
+
+@lru_cache(maxsize=2048)
+def _classify_label(label: str) -> Tuple[str, str]:
+    """按标签分类节点类型和图层（标签在路径间大量重复，结果按标签缓存）"""
+    # 公共交通 > 公共设施 > 室内节点 > 室内路径 > 室外路径
+    for pattern, node_type, layer in _NODE_TYPE_RULES:
+        if pattern.search(label):
+            return (node_type, layer)
+    
+    # 默认分类
+    return ("landmark", "outdoor")
+
+
+@lru_cache(maxsize=2048)
+def _facility_info_for_label(label: str) -> Dict[str, Any]:
+    """按标签提取公共设施信息（缓存结果为共享对象，含嵌套列表，调用方需深复制后使用）"""
+    for pattern, facility_info in _FACILITY_RULES:
+        if pattern.search(label):
+            return facility_info
+    
+    return {}
+
+
+@lru_cache(maxsize=2048)
+def _transit_info_for_label(label: str) -> Dict[str, Any]:
+    """按标签提取公共交通信息（缓存结果为共享对象，含嵌套列表，调用方需深复制后使用）"""
+    transit_info = {}
+    
+    # 地铁信息
+    if _SUBWAY_RE.search(label):
+        # 尝试提取线路号
+        line_match = _LINE_RE.search(label)
+        line_number = line_match.group() if line_match else "未知"
+        
+        transit_info = {
+            "type": "subway",
+            "line": line_number,
+            "status": "operational",
+            "frequency": "3-5分钟"
+        }
+    
+    # 公交信息
+    elif _BUS_RE.search(label):
+        bus_match = _LINE_RE.search(label)
+        bus_number = bus_match.group() if bus_match else "未知"
+        
+        transit_info = {
+            "type": "bus",
+            "route": bus_number,
+            "status": "operational",
+            "frequency": "5-10分钟"
+        }
+    
+    # 车站信息
+    elif _STATION_RE.search(label) and (_SUBWAY_RE.search(label) or _BUS_RE.search(label)):
+        transit_info = {
+            "type": "station",
+            "accessibility": "wheelchair_accessible",
+            "services": ["ticket", "info"]
+        }
+    
+    return transit_info
+
+
 class EnhancedMapGenerator:
     """增强地图生成器"""
     
-    def __init__(self, output_dir: str = "data/map_cards"):
+    def __init__(self, output_dir: str = "data/map_cards", fonts_dir: str = "assets/fonts"):
         """
         初始化增强地图生成器
         
         Args:
             output_dir: 输出目录
+            fonts_dir: 字体目录
         """
         self.output_dir = output_dir
+        self.fonts_dir = fonts_dir
         Path(self.output_dir).mkdir(parents=True, exist_ok=True)
         
         # 地图样式配置
@@ -40,6 +157,13 @@ class EnhancedMapGenerator:
             "text_size": 1.2,       # 文字大小
         }
         
+        # 保存编码参数（PNG低压缩级别以换取更快的编码）
+        self.save_config = {
+            "png_compression": 1,   # 0-9，OpenCV默认3
+            "webp_quality": 90,
+            "jpeg_quality": 90,
+        }
+        
         # 节点类型颜色映射（分层）
         self.node_colors = {
             "outdoor": (135, 206, 235),    # 天蓝色 - 室外节点
@@ -56,6 +180,17 @@ class EnhancedMapGenerator:
             "indoor": {"opacity": 0.95, "z_order": 2},
         }
         
+        # 空白画布模板（背景已填充），每次生成地图时复制使用
+        self._canvas_template_key: Optional[Tuple] = None
+        self._canvas_template: Optional[np.ndarray] = None
+        
+        # 节点标签字形缓存：{字符: 字形掩码}，每个字符只光栅化一次
+        self.label_font_size = 16
+        self._label_font = None
+        self._label_font_ascent = 0
+        self._label_font_height = 0
+        self._glyph_cache: Dict[str, np.ndarray] = {}
+        
         logger.info("🗺️ 增强地图生成器初始化完成")
     
     def classify_node_type(self, node_label: str, node) -> Tuple[str, str]:
@@ -69,30 +204,7 @@ class EnhancedMapGenerator:
         Returns:
             Tuple[str, str]: (节点类型, 图层)
         """
-        label_lower = node_label.lower()
-        
-        # 公共交通
-        if any(kw in label_lower for kw in ["地铁", "subway", "metro", "公交", "bus", "站"]):
-            return ("transit", "outdoor")
-        
-        # 公共设施
-        if any(kw in label_lower for kw in ["洗手间", "toilet", "卫生间", "wc", "电梯", "elevator", "扶梯", "escalator"]):
-            return ("facility", "indoor")
-        if any(kw in label_lower for kw in ["医院", "hospital", "商场", "mall", "超市", "supermarket"]):
-            return ("facility", "indoor")
-        
-        # 室内节点
-        if any(kw in label_lower for kw in ["室", "room", "office", "病房", "科室"]):
-            return ("indoor", "indoor")
-        
-        # 路径节点
-        if any(kw in label_lower for kw in ["口", "entrance", "exit", "走廊", "corridor", "过道"]):
-            return ("walkway", "indoor")
-        if any(kw in label_lower for kw in ["桥", "bridge", "道", "路", "road", "街", "street"]):
-            return ("walkway", "outdoor")
-        
-        # 默认分类
-        return ("landmark", "outdoor")
+        return _classify_label(node_label)
     
     def generate_enhanced_map_card(self, path_memory, output_name: str = None) -> str:
         """
@@ -107,37 +219,12 @@ class EnhancedMapGenerator:
         """
         try:
             # 创建画布
-            img = self._create_canvas()
+            img = self._get_blank_canvas()
             
             # 分析节点
-            nodes = path_memory.nodes
-            analyzed_nodes = []
-            total_distance = 0.0
-            
-            for i, node in enumerate(nodes):
-                # 分类节点类型
-                node_type, layer = self.classify_node_type(node.label, node)
-                
-                # 估算距离
-                if i > 0:
-                    prev_node = analyzed_nodes[-1]
-                    distance = self._estimate_distance(prev_node, node)
-                    total_distance += distance
-                else:
-                    distance = 0.0
-                
-                # 提取信息
-                analyzed_node = {
-                    'original': node,
-                    'type': node_type,
-                    'layer': layer,
-                    'distance': distance,
-                    'cumulative_distance': total_distance,
-                    'facility_info': self._extract_facility_info(node),
-                    'transit_info': self._extract_transit_info(node)
-                }
-                
-                analyzed_nodes.append(analyzed_node)
+            analyzed_nodes = self._analyze_nodes(path_memory.nodes)
+            cumulative = analyzed_nodes['cumulative_distance']
+            total_distance = float(cumulative[-1]) if len(cumulative) else 0.0
             
             # 计算布局
             layout = self._calculate_enhanced_layout(analyzed_nodes)
@@ -156,7 +243,7 @@ class EnhancedMapGenerator:
                 output_name = f"{path_memory.path_id}_enhanced_map.png"
             
             output_path = os.path.join(self.output_dir, output_name)
-            cv2.imwrite(output_path, img)
+            cv2.imwrite(output_path, img, self._encode_params(output_path))
             
             logger.info(f"🗺️ 增强地图已生成: {output_path}")
             return output_path
@@ -167,6 +254,51 @@ class EnhancedMapGenerator:
             traceback.print_exc()
             return ""
     
+    def _analyze_nodes(self, nodes: List) -> Dict[str, Any]:
+        """
+        分析节点，按列（SoA）存放各属性
+        
+        Args:
+            nodes: 路径节点列表
+            
+        Returns:
+            Dict[str, Any]: 列名 -> 与节点一一对应的数组/列表
+        """
+        num_nodes = len(nodes)
+        
+        # 分类节点类型
+        classified = [self.classify_node_type(node.label, node) for node in nodes]
+        types = np.array([c[0] for c in classified], dtype=object)
+        layers = np.array([c[1] for c in classified], dtype=object)
+        
+        # 估算距离（首个节点为0），累计距离由cumsum一次得出
+        distances = np.fromiter(
+            (self._estimate_distance(nodes[i - 1], node) if i > 0 else 0.0
+             for i, node in enumerate(nodes)),
+            dtype=np.float64, count=num_nodes
+        )
+        
+        return {
+            'original': list(nodes),
+            'type': types,
+            'layer': layers,
+            'distance': distances,
+            'cumulative_distance': np.cumsum(distances),
+            'facility_info': [self._extract_facility_info(node) for node in nodes],
+            'transit_info': [self._extract_transit_info(node) for node in nodes]
+        }
+    
+    def _encode_params(self, output_path: str) -> List[int]:
+        """根据输出文件扩展名选择编码参数"""
+        ext = os.path.splitext(output_path)[1].lower()
+        if ext == ".webp":
+            return [cv2.IMWRITE_WEBP_QUALITY, self.save_config["webp_quality"]]
+        if ext in (".jpg", ".jpeg"):
+            return [cv2.IMWRITE_JPEG_QUALITY, self.save_config["jpeg_quality"]]
+        if ext == ".png":
+            return [cv2.IMWRITE_PNG_COMPRESSION, self.save_config["png_compression"]]
+        return []
+    
     def _estimate_distance(self, prev_node, current_node) -> float:
         """估算节点间距离"""
         # 从direction字段提取距离
@@ -178,103 +310,21 @@ class EnhancedMapGenerator:
         if isinstance(prev_node, dict):
             prev_node = prev_node['original']
         
-        # 简单提取数字（米）
-        import re
-        numbers = re.findall(r'(\d+)', direction)
-        if numbers:
-            return float(numbers[0])
-        
-        # 默认估算：基于时间或固定值
-        return 10.0  # 默认10米
+        # 简单提取数字（米）；默认估算：基于时间或固定值，默认10米
+        match = _DIST_RE.search(direction)
+        return float(match.group()) if match else 10.0
     
     def _extract_facility_info(self, node) -> Dict[str, Any]:
-        """提取公共设施信息"""
-        label = node.label
-        label_lower = label.lower()
-        
-        facility_info = {}
-        
-        # 洗手间信息
-        if any(kw in label_lower for kw in ["洗手间", "toilet", "卫生间"]):
-            facility_info = {
-                "type": "restroom",
-                "available": True,
-                "accessibility": "wheelchair_accessible"
-            }
-        
-        # 电梯信息
-        elif any(kw in label_lower for kw in ["电梯", "elevator"]):
-            facility_info = {
-                "type": "elevator",
-                "capacity": "13人",
-                "accessibility": "wheelchair_accessible"
-            }
-        
-        # 医院信息
-        elif any(kw in label_lower for kw in ["医院", "hospital"]):
-            facility_info = {
-                "type": "hospital",
-                "services": ["emergency", "consultation"],
-                "hours": "24小时"
-            }
-        
-        # 商场信息
-        elif any(kw in label_lower for kw in ["商场", "mall"]):
-            facility_info = {
-                "type": "shopping_mall",
-                "services": ["shopping", "dining", "parking"],
-                "hours": "10:00-22:00"
-            }
-        
-        return facility_info
+        """提取公共设施信息（深复制，修改 services 等嵌套列表不会影响缓存和规则表）"""
+        return copy.deepcopy(_facility_info_for_label(node.label))
     
     def _extract_transit_info(self, node) -> Dict[str, Any]:
-        """提取公共交通信息"""
-        label = node.label
-        label_lower = label.lower()
-        
-        transit_info = {}
-        
-        # 地铁信息
-        if any(kw in label_lower for kw in ["地铁", "subway", "metro"]):
-            # 尝试提取线路号
-            import re
-            line_match = re.search(r'(\d+)', label)
-            line_number = line_match.group(1) if line_match else "未知"
-            
-            transit_info = {
-                "type": "subway",
-                "line": line_number,
-                "status": "operational",
-                "frequency": "3-5分钟"
-            }
-        
-        # 公交信息
-        elif any(kw in label_lower for kw in ["公交", "bus"]):
-            import re
-            bus_match = re.search(r'(\d+)', label)
-            bus_number = bus_match.group(1) if bus_match else "未知"
-            
-            transit_info = {
-                "type": "bus",
-                "route": bus_number,
-                "status": "operational",
-                "frequency": "5-10分钟"
-            }
-        
-        # 车站信息
-        elif "站" in label_lower and ("地铁" in label_lower or "公交" in label_lower):
-            transit_info = {
-                "type": "station",
-                "accessibility": "wheelchair_accessible",
-                "services": ["ticket", "info"]
-            }
-        
-        return transit_info
+        """提取公共交通信息（深复制，修改 services 等嵌套列表不会影响缓存）"""
+        return copy.deepcopy(_transit_info_for_label(node.label))
     
-    def _calculate_enhanced_layout(self, nodes: List[Dict]) -> Dict[str, Any]:
+    def _calculate_enhanced_layout(self, nodes: Dict[str, Any]) -> Dict[str, Any]:
         """计算增强布局"""
-        num_nodes = len(nodes)
+        num_nodes = len(nodes['original'])
         width = self.map_config["width"]
         height = self.map_config["height"]
         
@@ -293,74 +343,181 @@ class EnhancedMapGenerator:
         
         return layout
     
-    def _draw_enhanced_map(self, img: np.ndarray, nodes: List[Dict], layout: Dict):
+    def _draw_enhanced_map(self, img: np.ndarray, nodes: Dict[str, Any], layout: Dict):
         """绘制增强地图"""
-        # 按图层分组绘制
-        outdoor_nodes = [n for n in nodes if n['layer'] == 'outdoor']
-        indoor_nodes = [n for n in nodes if n['layer'] == 'indoor']
+        # 按图层分组绘制（布尔掩码取下标）
+        layers = nodes['layer']
         
         # 绘制室外图层
-        self._draw_layer(img, outdoor_nodes, layout, 'outdoor')
+        self._draw_layer(img, nodes, np.flatnonzero(layers == 'outdoor'), layout, 'outdoor')
         
         # 绘制室内图层
-        self._draw_layer(img, indoor_nodes, layout, 'indoor')
+        self._draw_layer(img, nodes, np.flatnonzero(layers == 'indoor'), layout, 'indoor')
     
-    def _draw_layer(self, img: np.ndarray, nodes: List[Dict], layout: Dict, layer: str):
+    def _draw_layer(self, img: np.ndarray, nodes: Dict[str, Any], indices: np.ndarray,
+                    layout: Dict, layer: str):
         """绘制图层"""
-        if not nodes:
+        if not len(indices):
             return
         
         x_spacing = layout['spacing']
-        y_base = layout['start_y'] + layout['layer_offsets'].get(layer, 0)
-        
-        for i, node in enumerate(nodes):
-            x = layout['start_x'] + i * x_spacing
-            y = y_base
-            
-            node_type = node['type']
-            color = self.node_colors.get(node_type, (128, 128, 128))
-            
-            # 绘制节点
-            self._draw_node(img, node, x, y, color)
-            
-            # 绘制连线（除了第一个节点）
-            if i > 0:
-                self._draw_connection(img, nodes[i-1], node, x - x_spacing, y, x, y)
+        y = int(layout['start_y'] + layout['layer_offsets'].get(layer, 0))
+        
+        # 一次性计算所有节点中心和颜色
+        xs = (layout['start_x'] + np.arange(len(indices)) * x_spacing).astype(np.int32)
+        default_color = (128, 128, 128)
+        colors = [self.node_colors.get(node_type, default_color) for node_type in nodes['type'][indices]]
+        originals = nodes['original']
+        labels = [originals[i].label for i in indices.tolist()]
+        distances = nodes['distance'][indices].tolist()
+        node_size = self.map_config["node_size"]
+        draw_node = self._draw_node
+        
+        # 绘制节点
+        for label, distance, x, color in zip(labels, distances, xs.tolist(), colors):
+            draw_node(img, label, distance, x, y, color, node_size)
+        
+        # 绘制连线（按起点颜色分组，每组一次 polylines 调用）
+        if len(indices) > 1:
+            self._draw_connections(img, xs, y, colors[:-1])
     
-    def _draw_node(self, img: np.ndarray, node: Dict, x: int, y: int, color: Tuple[int, int, int]):
-        """绘制节点"""
-        # 节点圆圈
-        cv2.circle(img, (int(x), int(y)), self.map_config["node_size"], color, -1)
-        cv2.circle(img, (int(x), int(y)), self.map_config["node_size"], (255, 255, 255), 3)
+    def _draw_node(self, img: np.ndarray, label: str, distance: float, x: int, y: int,
+                   color: Tuple[int, int, int], node_size: Optional[int] = None):
+        """绘制节点（node_size 由调用方在循环外取出后传入）"""
+        if node_size is None:
+            node_size = self.map_config["node_size"]
         
-        # 节点编号
-        node_id = len([n for n in node if 'original' in n]) if isinstance(node, list) else 0
-        # 这里简化处理，实际应该传递正确的节点索引
+        # 节点圆圈
+        cv2.circle(img, (x, y), node_size, color, -1)
+        cv2.circle(img, (x, y), node_size, (255, 255, 255), 3)
         
         # 节点标签
-        label = node['original'].label if isinstance(node, dict) else node.label
         label_lines = label.split('（') if '（' in label else [label]
         label_short = label_lines[0]
         
         # 添加距离信息
-        if 'distance' in node:
-            distance_text = f"{node['distance']:.0f}m"
-            cv2.putText(img, distance_text, (int(x-30), int(y-90)),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        distance_text = f"{distance:.0f}m"
+        cv2.putText(img, distance_text, (x-30, y-90),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
         
         # 节点标签
-        cv2.putText(img, label_short, (int(x-80), int(y+100)),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        self._draw_label(img, label_short, x-80, y+100, color)
     
-    def _draw_connection(self, img: np.ndarray, from_node: Dict, to_node: Dict, 
-                        x1: float, y1: float, x2: float, y2: float):
-        """绘制连接线"""
-        color = self.node_colors.get(from_node['type'], (128, 128, 128))
-        pt1 = (int(x1+self.map_config["node_size"]//2), int(y1))
-        pt2 = (int(x2-self.map_config["node_size"]//2), int(y2))
-        cv2.arrowedLine(img, pt1, pt2, color, self.map_config["line_width"], tipLength=0.3)
+    def _load_chinese_font(self, size: int = 16):
+        """加载中文字体"""
+        font_paths = [
+            os.path.join(self.fonts_dir, "handwriting.ttc"),
+            os.path.join(self.fonts_dir, "handwriting.ttf"),
+            "/System/Library/Fonts/PingFang.ttc",
+            "/System/Library/Fonts/STHeiti Light.ttc",
+            "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+        ]
+        
+        for font_path in font_paths:
+            if os.path.exists(font_path):
+                try:
+                    return ImageFont.truetype(font_path, size)
+                except OSError:
+                    continue
+        
+        return ImageFont.load_default()
     
-    def _add_info_panel(self, img: np.ndarray, path_memory, nodes: List[Dict], total_distance: float):
+    def _get_glyph(self, char: str) -> np.ndarray:
+        """获取字符的字形掩码（未命中时用PIL光栅化并缓存）"""
+        glyph = self._glyph_cache.get(char)
+        if glyph is None:
+            if self._label_font is None:
+                self._label_font = self._load_chinese_font(self.label_font_size)
+                if hasattr(self._label_font, "getmetrics"):
+                    ascent, descent = self._label_font.getmetrics()
+                else:
+                    ascent, descent = self._label_font.getbbox("Ag")[3], 0
+                self._label_font_ascent = ascent
+                self._label_font_height = ascent + descent
+            
+            font = self._label_font
+            width = max(int(font.getbbox(char)[2]), 1)
+            tile = Image.new("L", (width, self._label_font_height), 0)
+            ImageDraw.Draw(tile).text((0, 0), char, fill=255, font=font)
+            glyph = np.asarray(tile) > 127
+            self._glyph_cache[char] = glyph
+        
+        return glyph
+    
+    def _draw_label(self, img: np.ndarray, text: str, x: int, y: int, color: Tuple[int, int, int]):
+        """
+        用缓存字形绘制标签（支持中文）
+        
+        Args:
+            img: 画布
+            text: 标签文字
+            x: 起点x坐标
+            y: 基线y坐标（与cv2.putText的org一致）
+            color: 文字颜色
+        """
+        glyphs = [self._get_glyph(char) for char in text]
+        if not glyphs:
+            return
+        
+        img_h, img_w = img.shape[:2]
+        top = y - self._label_font_ascent
+        color_arr = np.array(color, dtype=np.uint8)
+        
+        for glyph in glyphs:
+            h, w = glyph.shape
+            # 裁剪到画布范围内
+            x0, y0 = max(x, 0), max(top, 0)
+            x1, y1 = min(x + w, img_w), min(top + h, img_h)
+            if x0 < x1 and y0 < y1:
+                mask = glyph[y0 - top:y1 - top, x0 - x:x1 - x]
+                np.copyto(img[y0:y1, x0:x1], color_arr, where=mask[..., None])
+            x += w
+    
+    def _draw_connections(self, img: np.ndarray, xs: np.ndarray, y: int,
+                          colors: List[Tuple[int, int, int]]):
+        """
+        批量绘制连接箭头
+        
+        每个箭头展开为折线 起点→终点→左箭头→终点→右箭头，
+        几何与 cv2.arrowedLine(tipLength=0.3) 一致。
+        
+        Args:
+            img: 画布
+            xs: 节点中心x坐标
+            y: 图层y坐标
+            colors: 每段连线的颜色（取起点节点颜色）
+        """
+        half = self.map_config["node_size"] // 2
+        x1 = xs[:-1] + half
+        x2 = xs[1:] - half
+        
+        # 箭头尖端两翼
+        dx = (x1 - x2).astype(np.float64)
+        tip = np.abs(dx) * 0.3
+        angle = np.arctan2(0.0, dx)
+        wing_lx = np.rint(x2 + tip * np.cos(angle + np.pi / 4)).astype(np.int32)
+        wing_ly = np.rint(y + tip * np.sin(angle + np.pi / 4)).astype(np.int32)
+        wing_rx = np.rint(x2 + tip * np.cos(angle - np.pi / 4)).astype(np.int32)
+        wing_ry = np.rint(y + tip * np.sin(angle - np.pi / 4)).astype(np.int32)
+        
+        ys = np.full_like(x1, y)
+        arrows = np.stack([
+            np.stack([x1, ys], axis=1),
+            np.stack([x2, ys], axis=1),
+            np.stack([wing_lx, wing_ly], axis=1),
+            np.stack([x2, ys], axis=1),
+            np.stack([wing_rx, wing_ry], axis=1),
+        ], axis=1).astype(np.int32)
+        
+        groups: Dict[Tuple[int, int, int], List[np.ndarray]] = {}
+        for arrow, color in zip(arrows, colors):
+            groups.setdefault(color, []).append(arrow)
+        
+        line_width = self.map_config["line_width"]
+        for color, polylines in groups.items():
+            cv2.polylines(img, polylines, False, color, line_width)
+    
+    def _add_info_panel(self, img: np.ndarray, path_memory, nodes: Dict[str, Any], total_distance: float):
         """添加信息面板"""
         width = self.map_config["width"]
         panel_x = width - 350
@@ -386,8 +543,7 @@ class EnhancedMapGenerator:
         
         # 节点统计
         node_counts = {}
-        for node in nodes:
-            node_type = node['type']
+        for node_type in nodes['type']:
             node_counts[node_type] = node_counts.get(node_type, 0) + 1
         
         for node_type, count in node_counts.items():
@@ -402,14 +558,24 @@ class EnhancedMapGenerator:
         cv2.putText(img, title, (width//2 - 200, 40),
                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
     
+    def _get_blank_canvas(self) -> np.ndarray:
+        """获取空白画布（复制缓存的模板，map_config变化时重建模板）"""
+        key = (self.map_config["width"], self.map_config["height"], tuple(self.map_config["bg_color"]))
+        if self._canvas_template is None or self._canvas_template_key != key:
+            self._canvas_template = self._create_canvas()
+            self._canvas_template_key = key
+        
+        return self._canvas_template.copy()
+    
     def _create_canvas(self) -> np.ndarray:
         """创建画布"""
         width = self.map_config["width"]
         height = self.map_config["height"]
         bg_color = self.map_config["bg_color"]
         
-        img = np.ones((height, width, 3), dtype=np.uint8)
-        img[:, :] = bg_color
+        # 单次写入填充背景（避免先置1再覆盖的两遍内存写）
+        img = np.empty((height, width, 3), dtype=np.uint8)
+        img[:] = bg_color
         
         return img
 
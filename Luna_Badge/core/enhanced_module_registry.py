@@ -13,12 +13,17 @@ P1-2: 统一模块管理
 - 事件总线集成
 """
 
+import heapq
 import logging
+from array import array
+import threading
 import time
-from typing import Dict, List, Optional, Type, Any
-from pathlib import Path
+import types
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple, Type, Any
 from collections import defaultdict
 from dataclasses import dataclass
+from functools import lru_cache
 
 # 导入基础模块
 try:
@@ -44,6 +49,12 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# 状态 -> 状态值 查找表，避免每次反射访问 .value
+_STATE_VALUES: Dict[Any, str] = {state: state.value for state in ModuleState}
+_ACTIVE = ModuleState.ACTIVE
+_STOPPED = ModuleState.STOPPED
+_ERROR = ModuleState.ERROR
+
 
 @dataclass
 class ModuleInfo:
@@ -53,7 +64,10 @@ class ModuleInfo:
     dependencies: List[str]
     auto_start: bool = True
     priority: int = 0
-    registered_at: float = 0
+    registered_at: float = 0  # 注册时间（time.time()，墙钟时间）
+    registered_mono: float = 0  # 注册时的 time.monotonic()，仅用于比较先后/计算间隔
+    id: int = -1  # 依赖图数组中的整数ID
+    has_version: bool = False  # 注册时确定模块是否有 version 属性
 
 
 class EnhancedModuleRegistry:
@@ -70,6 +84,12 @@ class EnhancedModuleRegistry:
     
     def __init__(self):
         """初始化模块注册表"""
+        # 保护模块字典、依赖图和启动顺序缓存；模块的 start()/stop() 在锁外调用
+        self._lock = threading.RLock()
+        
+        # 同层模块是否并行启动/停止（开启后各模块的 start()/stop() 必须线程安全）
+        self.parallel_start = False
+        
         # 模块字典：{name: ModuleInfo}
         self.modules: Dict[str, ModuleInfo] = {}
         
@@ -79,8 +99,25 @@ class EnhancedModuleRegistry:
         
         # 启动顺序缓存
         self.startup_order: List[str] = []
+        self.startup_levels: List[List[str]] = []
         self._order_dirty = True
         
+        # 最近一次计算启动顺序时为打破循环依赖而忽略的依赖边：(被依赖模块, 依赖者)
+        self.cycles_broken: List[Tuple[str, str]] = []
+        
+        # 在线拓扑序（Pearce-Kelly）：注册/注销时增量维护，
+        # 对任意已注册的依赖边 dep -> name 保持 _n2i[dep] < _n2i[name]
+        self._n2i: Dict[str, int] = {}
+        self._i2n: List[Optional[str]] = []
+        
+        # 按整数ID索引的CSR依赖图（依赖关系变化后重建）
+        self._id2name: List[str] = []
+        self._indeg: List[int] = []
+        self._dep_indptr = array('i', [0])
+        self._dep_indices = array('i')
+        self._rdep_indptr = array('i', [0])
+        self._rdep_indices = array('i')
+        
         logger.info("📚 增强版模块注册表初始化完成")
     
     def register(self,
@@ -99,30 +136,49 @@ class EnhancedModuleRegistry:
             auto_start: 是否自动启动
             priority: 优先级（数字越小优先级越高）
         """
-        if name in self.modules:
-            logger.warning(f"⚠️ 模块 {name} 已存在，将被覆盖")
-        
-        deps = dependencies or []
-        module_info = ModuleInfo(
-            name=name,
-            module=module,
-            dependencies=deps,
-            auto_start=auto_start,
-            priority=priority,
-            registered_at=time.time()
-        )
-        
-        self.modules[name] = module_info
-        
-        # 更新依赖关系
-        self.dependencies[name] = deps
-        for dep in deps:
-            self.dependents[dep].append(name)
-        
-        # 标记启动顺序需要重新计算
-        self._order_dirty = True
-        
-        logger.info(f"✅ 模块 {name} 已注册 (依赖: {deps if deps else '无'})")
+        with self._lock:
+            if name in self.modules:
+                logger.warning(f"⚠️ 模块 {name} 已存在，将被覆盖")
+                # 清除旧的依赖边
+                for old_dep in self.dependencies.get(name, []):
+                    if name in self.dependents.get(old_dep, []):
+                        self.dependents[old_dep].remove(name)
+            
+            deps = dependencies or []
+            module_info = ModuleInfo(
+                name=name,
+                module=module,
+                dependencies=deps,
+                auto_start=auto_start,
+                priority=priority,
+                registered_at=time.time(),
+                registered_mono=time.monotonic(),
+                has_version=hasattr(module, 'version')
+            )
+            
+            self.modules[name] = module_info
+            
+            # 更新依赖关系
+            self.dependencies[name] = deps
+            for dep in deps:
+                self.dependents[dep].append(name)
+            
+            # 增量维护拓扑序：新模块取末尾下标，仅对违反顺序的边做局部重排
+            if name not in self._n2i:
+                self._n2i[name] = len(self._i2n)
+                self._i2n.append(name)
+            for dep in deps:
+                if dep in self._n2i:
+                    self._pk_add_edge(dep, name)
+            for dependent in self.dependents.get(name, []):
+                if dependent in self._n2i:
+                    self._pk_add_edge(name, dependent)
+            
+            # 标记启动顺序需要重新计算
+            self._order_dirty = True
+            self.unfreeze()
+            
+            logger.info(f"✅ 模块 {name} 已注册 (依赖: {deps if deps else '无'})")
     
     def unregister(self, name: str) -> bool:
         """
@@ -134,30 +190,39 @@ class EnhancedModuleRegistry:
         Returns:
             是否注销成功
         """
-        if name not in self.modules:
-            logger.warning(f"⚠️ 模块 {name} 不存在")
-            return False
-        
-        # 停止模块
-        module_info = self.modules[name]
-        if module_info.module.state == ModuleState.ACTIVE:
-            module_info.module.stop()
-        
-        # 移除依赖关系
-        if name in self.dependencies:
-            del self.dependencies[name]
-        
-        if name in self.dependents:
-            deps = self.dependents.pop(name)
-            for dep in deps:
-                if name in self.dependencies.get(dep, []):
-                    self.dependencies[dep].remove(name)
-        
-        del self.modules[name]
-        self._order_dirty = True
-        
-        logger.info(f"✅ 模块 {name} 已注销")
-        return True
+        with self._lock:
+            if name not in self.modules:
+                logger.warning(f"⚠️ 模块 {name} 不存在")
+                return False
+            
+            # 停止模块
+            module_info = self.modules[name]
+            if module_info.module.state is _ACTIVE:
+                module_info.module.stop()
+            
+            # 移除依赖关系
+            for dep in self.dependencies.pop(name, []):
+                if name in self.dependents.get(dep, []):
+                    self.dependents[dep].remove(name)
+            
+            if name in self.dependents:
+                deps = self.dependents.pop(name)
+                for dep in deps:
+                    if name in self.dependencies.get(dep, []):
+                        self.dependencies[dep].remove(name)
+            
+            del self.modules[name]
+            
+            # 拓扑序中留空位即可，其余模块的相对顺序仍然有效
+            index = self._n2i.pop(name, None)
+            if index is not None:
+                self._i2n[index] = None
+            
+            self._order_dirty = True
+            self.unfreeze()
+            
+            logger.info(f"✅ 模块 {name} 已注销")
+            return True
     
     def get_module(self, name: str) -> Optional[BaseModule]:
         """
@@ -169,12 +234,251 @@ class EnhancedModuleRegistry:
         Returns:
             模块实例或None
         """
-        return self.modules.get(name, ModuleInfo(name="", module=None, dependencies=[])).module
+        info = self.modules.get(name)
+        return info.module if info is not None else None
     
     def get_module_info(self, name: str) -> Optional[ModuleInfo]:
         """获取模块信息"""
         return self.modules.get(name)
     
+    def _pk_add_edge(self, u: str, v: str) -> bool:
+        """
+        插入依赖边 u -> v 并维护拓扑序（Pearce-Kelly 算法）
+        
+        仅当 _n2i[u] > _n2i[v] 时需要重排：从 v 向前搜索下标 < _n2i[u] 的受影响区域，
+        从 u 向后搜索下标 > _n2i[v] 的受影响区域，再把两者的下标池重新分配。
+        
+        Args:
+            u: 被依赖的模块
+            v: 依赖 u 的模块
+            
+        Returns:
+            是否成功（False 表示该边会形成循环依赖）
+        """
+        n2i = self._n2i
+        lower, upper = n2i[v], n2i[u]
+        if lower > upper:
+            return True
+        if lower == upper:
+            logger.error(f"❌ 检测到循环依赖: {u} -> {v}")
+            return False
+        
+        # 前向搜索：v 的（传递）依赖者
+        forward: List[str] = []
+        visited = {v}
+        stack = [v]
+        while stack:
+            node = stack.pop()
+            forward.append(node)
+            for w in self.dependents.get(node, []):
+                index = n2i.get(w)
+                if index is None or w in visited:
+                    continue
+                if index == upper:
+                    logger.error(f"❌ 检测到循环依赖: {u} -> {v} -> ... -> {u}")
+                    return False
+                if index < upper:
+                    visited.add(w)
+                    stack.append(w)
+        
+        # 后向搜索：u 的（传递）依赖
+        backward: List[str] = []
+        visited = {u}
+        stack = [u]
+        while stack:
+            node = stack.pop()
+            backward.append(node)
+            for w in self.dependencies.get(node, []):
+                index = n2i.get(w)
+                if index is None or w in visited:
+                    continue
+                if index > lower:
+                    visited.add(w)
+                    stack.append(w)
+        
+        # 重新分配下标：依赖一侧整体排在依赖者一侧之前
+        backward.sort(key=n2i.__getitem__)
+        forward.sort(key=n2i.__getitem__)
+        slots = sorted(n2i[n] for n in backward + forward)
+        for index, node in zip(slots, backward + forward):
+            n2i[node] = index
+            self._i2n[index] = node
+        
+        return True
+    
+    def get_topological_order(self) -> List[str]:
+        """获取增量维护的拓扑序（不考虑优先级）"""
+        with self._lock:
+            return [name for name in self._i2n if name is not None]
+    
+    def _rebuild_graph_arrays(self):
+        """
+        按整数ID重建依赖图数组（仅在依赖关系变化后调用）
+        
+        依赖图以CSR（压缩稀疏行）形式存放在连续的 array('i') 中：
+        模块 i 的已注册依赖为 _dep_indices[_dep_indptr[i]:_dep_indptr[i+1]]，
+        依赖模块 i 的模块为 _rdep_indices[_rdep_indptr[i]:_rdep_indptr[i+1]]。
+        _indeg[i] 为模块 i 的依赖数（含未注册的依赖，使其无法启动）。
+        """
+        names = list(self.modules)
+        ids = {name: i for i, name in enumerate(names)}
+        count = len(names)
+        indeg = [0] * count
+        dep_indptr = array('i', [0])
+        dep_indices = array('i')
+        rdep_counts = [0] * count
+        
+        for i, name in enumerate(names):
+            self.modules[name].id = i
+            deps = self.dependencies.get(name, [])
+            indeg[i] = len(deps)
+            for dep in deps:
+                j = ids.get(dep)
+                if j is not None:
+                    dep_indices.append(j)
+                    rdep_counts[j] += 1
+            dep_indptr.append(len(dep_indices))
+        
+        # 反向边：按计数前缀和定位，再按模块ID顺序填充
+        rdep_indptr = array('i', [0]) * (count + 1)
+        for j in range(count):
+            rdep_indptr[j + 1] = rdep_indptr[j] + rdep_counts[j]
+        rdep_indices = array('i', [0]) * len(dep_indices)
+        cursor = rdep_indptr[:-1].tolist()
+        for i in range(count):
+            for k in range(dep_indptr[i], dep_indptr[i + 1]):
+                j = dep_indices[k]
+                rdep_indices[cursor[j]] = i
+                cursor[j] += 1
+        
+        self._id2name = names
+        self._indeg = indeg
+        self._dep_indptr = dep_indptr
+        self._dep_indices = dep_indices
+        self._rdep_indptr = rdep_indptr
+        self._rdep_indices = rdep_indices
+    
+    def _tarjan_scc(self) -> List[List[str]]:
+        """
+        用 Tarjan 算法求依赖图的强连通分量（迭代实现，基于CSR数组）
+        
+        Returns:
+            强连通分量列表（按逆拓扑序），大小大于1或带自环的分量即为循环依赖
+        """
+        names = self._id2name
+        indptr = self._rdep_indptr
+        indices = self._rdep_indices
+        count = len(names)
+        
+        index = [-1] * count
+        lowlink = [0] * count
+        on_stack = [False] * count
+        stack: List[int] = []
+        components: List[List[str]] = []
+        counter = 0
+        
+        for root in range(count):
+            if index[root] != -1:
+                continue
+            
+            # 调用栈元素：(节点, 下一条待访问边的位置)
+            work = [(root, indptr[root])]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            
+            while work:
+                node, k = work[-1]
+                if k < indptr[node + 1]:
+                    work[-1] = (node, k + 1)
+                    w = indices[k]
+                    if index[w] == -1:
+                        index[w] = lowlink[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append((w, indptr[w]))
+                    elif on_stack[w] and index[w] < lowlink[node]:
+                        lowlink[node] = index[w]
+                    continue
+                
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component.append(names[w])
+                        if w == node:
+                            break
+                    components.append(component)
+        
+        return components
+    
+    def _break_cycles(self) -> Set[Tuple[int, int]]:
+        """
+        打破循环依赖：对每个循环分量，从分量内依赖数最少的模块出发做DFS，去掉回边
+        
+        Returns:
+            被忽略的依赖边集合 {(被依赖模块ID, 依赖者ID)}
+        """
+        indptr = self._rdep_indptr
+        indices = self._rdep_indices
+        broken: Set[Tuple[int, int]] = set()
+        self.cycles_broken = []
+        
+        for component in self._tarjan_scc():
+            ids = [self.modules[name].id for name in component]
+            members = set(ids)
+            if len(ids) == 1:
+                i = ids[0]
+                if i not in indices[indptr[i]:indptr[i + 1]]:
+                    continue
+            
+            # 分量内入度（受限入度）最小者作为入口，同分按模块ID
+            restricted = {i: 0 for i in ids}
+            for i in ids:
+                for k in range(indptr[i], indptr[i + 1]):
+                    if indices[k] in members:
+                        restricted[indices[k]] += 1
+            entry = min(ids, key=lambda i: (restricted[i], i))
+            
+            # 分量内DFS，指向DFS栈上节点的边即为回边
+            visited = {entry}
+            on_path = {entry}
+            work = [(entry, indptr[entry])]
+            while work:
+                node, k = work[-1]
+                if k == indptr[node + 1]:
+                    work.pop()
+                    on_path.discard(node)
+                    continue
+                work[-1] = (node, k + 1)
+                w = indices[k]
+                if w not in members:
+                    continue
+                if w in on_path:
+                    broken.add((node, w))
+                elif w not in visited:
+                    visited.add(w)
+                    on_path.add(w)
+                    work.append((w, indptr[w]))
+            
+            cycle_names = [self._id2name[i] for i in sorted(ids)]
+            logger.error(f"❌ 检测到循环依赖: {cycle_names}")
+        
+        for u, v in sorted(broken):
+            self.cycles_broken.append((self._id2name[u], self._id2name[v]))
+            logger.warning(f"⚠️ 忽略依赖 {self._id2name[v]} -> {self._id2name[u]} 以打破循环")
+        
+        return broken
+    
     def _calculate_startup_order(self) -> List[str]:
         """
         计算模块启动顺序（拓扑排序）
@@ -184,33 +488,68 @@ class EnhancedModuleRegistry:
         if not self._order_dirty:
             return self.startup_order.copy()
         
-        # 使用拓扑排序计算启动顺序
-        order = []
-        in_degree = {name: len(self.dependencies.get(name, [])) for name in self.modules}
-        queue = [name for name, degree in in_degree.items() if degree == 0]
+        self._rebuild_graph_arrays()
+        names = self._id2name
+        in_degree = self._indeg.copy()
+        rdep_indptr = self._rdep_indptr
+        rdep_indices = self._rdep_indices
+        
+        # 先打破循环依赖，保证返回的顺序总是有效
+        broken = self._break_cycles()
+        for dep, dependent in broken:
+            for k in range(rdep_indptr[dep], rdep_indptr[dep + 1]):
+                if rdep_indices[k] == dependent:
+                    in_degree[dependent] -= 1
+        
+        # 使用拓扑排序计算启动顺序：小顶堆按 (优先级, 拓扑下标) 取下一个模块
+        priorities = [self.modules[name].priority for name in names]
+        topo_index = [self._n2i[name] for name in names]
+        heap = [(priorities[i], topo_index[i], i) for i, degree in enumerate(in_degree) if degree == 0]
+        heapq.heapify(heap)
         
-        while queue:
-            # 按优先级排序
-            queue.sort(key=lambda n: self.modules[n].priority)
+        order = []
+        # 层级：所有依赖都位于更早的层级，同层模块之间互不依赖
+        level = [0] * len(names)
+        levels: List[List[str]] = []
+        while heap:
+            _, _, current = heapq.heappop(heap)
+            order.append(names[current])
             
-            current = queue.pop(0)
-            order.append(current)
+            current_level = level[current]
+            if current_level == len(levels):
+                levels.append([])
+            levels[current_level].append(names[current])
             
             # 减少依赖此模块的其他模块的入度
-            for dependent in self.dependents.get(current, []):
+            for k in range(rdep_indptr[current], rdep_indptr[current + 1]):
+                dependent = rdep_indices[k]
+                if broken and (current, dependent) in broken:
+                    continue
+                if level[dependent] <= current_level:
+                    level[dependent] = current_level + 1
                 in_degree[dependent] -= 1
                 if in_degree[dependent] == 0:
-                    queue.append(dependent)
+                    heapq.heappush(heap, (priorities[dependent], topo_index[dependent], dependent))
         
-        # 检查是否有循环依赖
+        # 循环已被打破，剩下的只可能是依赖了未注册模块的模块
         if len(order) < len(self.modules):
             remaining = set(self.modules.keys()) - set(order)
-            logger.error(f"❌ 检测到循环依赖: {remaining}")
+            logger.error(f"❌ 以下模块的依赖未注册，无法确定启动顺序: {remaining}")
         
         self.startup_order = order
+        self.startup_levels = levels
         self._order_dirty = False
         
-        return order
+        return order.copy()
+    
+    def _calculate_startup_levels(self) -> List[List[str]]:
+        """
+        计算模块启动层级
+        
+        返回按层级分组的模块名称列表，每层内部保持启动顺序
+        """
+        self._calculate_startup_order()
+        return [list(level) for level in self.startup_levels]
     
     def start_module(self, name: str, start_dependencies: bool = True) -> bool:
         """
@@ -223,28 +562,49 @@ class EnhancedModuleRegistry:
         Returns:
             是否启动成功
         """
-        if name not in self.modules:
-            logger.error(f"❌ 模块 {name} 不存在")
-            return False
-        
-        module_info = self.modules[name]
-        
-        # 检查依赖
-        if start_dependencies:
-            for dep_name in module_info.dependencies:
-                if dep_name not in self.modules:
-                    logger.error(f"❌ 模块 {name} 的依赖 {dep_name} 不存在")
-                    return False
+        # 在锁内确定要启动的模块对象，start() 本身在锁外调用
+        with self._lock:
+            if name not in self.modules:
+                logger.error(f"❌ 模块 {name} 不存在")
+                return False
+            
+            module = self.modules[name].module
+            
+            # 检查依赖：迭代后序DFS收集未启动的（传递）依赖，每个模块只访问一次
+            dep_modules = []
+            if start_dependencies:
+                order = []
+                visited = set()
+                stack = [(name, False)]
+                while stack:
+                    current, expanded = stack.pop()
+                    if expanded:
+                        order.append(current)
+                        continue
+                    if current in visited:
+                        continue
+                    visited.add(current)
+                    stack.append((current, True))
+                    
+                    for dep_name in reversed(self.modules[current].dependencies):
+                        if dep_name not in self.modules:
+                            logger.error(f"❌ 模块 {current} 的依赖 {dep_name} 不存在")
+                            return False
+                        if dep_name not in visited and self.modules[dep_name].module.state is not _ACTIVE:
+                            stack.append((dep_name, False))
                 
-                dep_module_info = self.modules[dep_name]
-                if dep_module_info.module.state != ModuleState.ACTIVE:
-                    logger.info(f"🔄 启动依赖模块 {dep_name}...")
-                    if not self.start_module(dep_name, start_dependencies=True):
-                        logger.error(f"❌ 无法启动依赖模块 {dep_name}")
-                        return False
+                # 按后序（依赖在前）排列依赖模块，最后一个为模块自身
+                dep_modules = [(dep_name, self.modules[dep_name].module) for dep_name in order[:-1]]
+        
+        for dep_name, dep_module in dep_modules:
+            if dep_module.state is not _ACTIVE:
+                logger.info(f"🔄 启动依赖模块 {dep_name}...")
+                if not dep_module.start():
+                    logger.error(f"❌ 无法启动依赖模块 {dep_name}")
+                    return False
         
         # 启动模块
-        return module_info.module.start()
+        return module.start()
     
     def stop_module(self, name: str) -> bool:
         """
@@ -256,67 +616,156 @@ class EnhancedModuleRegistry:
         Returns:
             是否停止成功
         """
-        if name not in self.modules:
-            logger.error(f"❌ 模块 {name} 不存在")
-            return False
-        
-        module_info = self.modules[name]
-        
-        # 检查是否被其他模块依赖
-        dependents = self.dependents.get(name, [])
-        active_dependents = [dep for dep in dependents if self.modules[dep].module.state == ModuleState.ACTIVE]
+        with self._lock:
+            if name not in self.modules:
+                logger.error(f"❌ 模块 {name} 不存在")
+                return False
+            
+            module = self.modules[name].module
+            
+            # 检查是否被其他模块依赖
+            dependents = self.dependents.get(name, [])
+            active_dependents = [dep for dep in dependents
+                                 if dep in self.modules and self.modules[dep].module.state is _ACTIVE]
         
         if active_dependents:
             logger.warning(f"⚠️ 以下活跃模块依赖 {name}: {active_dependents}")
         
-        return module_info.module.stop()
+        return module.stop()
     
     def start_all(self, include_non_auto: bool = False) -> Dict[str, bool]:
         """
         启动所有模块
         
+        按启动层级依次启动；parallel_start 为True时同层模块在线程池中并行启动，
+        此时各模块的 start() 可能与其他模块的 start() 同时执行，必须线程安全。
+        
         Args:
             include_non_auto: 是否包括非自动启动的模块
             
         Returns:
             每个模块的启动结果
         """
-        order = self._calculate_startup_order()
-        
-        if include_non_auto:
-            names_to_start = order
-        else:
-            names_to_start = [name for name in order if self.modules[name].auto_start]
+        # 在锁内取启动层级和模块对象的快照，启动过程中注册/注销模块不影响本次启动
+        with self._lock:
+            levels = self._calculate_startup_levels()
+            if not include_non_auto:
+                levels = [[name for name in level if self.modules[name].auto_start] for level in levels]
+            modules = {name: self.modules[name].module for level in levels for name in level}
         
-        results = {}
-        for name in names_to_start:
-            results[name] = self.start_module(name, start_dependencies=False)
-            time.sleep(0.1)  # 短暂延迟
+        results = self._run_by_level(levels, lambda name: modules[name].start())
         
-        logger.info(f"📊 启动完成: {sum(results.values())}/{len(results)} 个模块成功")
+        self._log_results("启动完成", results)
         return results
     
+    def freeze(self):
+        """
+        冻结当前模块集合：把启动顺序展开成直线代码，生成实例级的 start_all
+        
+        生成的函数按启动层级顺序依次调用各自动启动模块的 start()，省去拓扑排序、
+        依赖检查和字典查找；include_non_auto=True 时仍走原来的 start_all。
+        register/unregister 会自动解除冻结。
+        """
+        with self._lock:
+            order = [name for level in self._calculate_startup_levels() for name in level
+                     if self.modules[name].auto_start]
+            modules = [self.modules[name].module for name in order]
+        
+        namespace: Dict[str, Any] = {"_start_all": EnhancedModuleRegistry.start_all}
+        lines = [
+            "def _start_all_frozen(self, include_non_auto=False):",
+            "    if include_non_auto:",
+            "        return _start_all(self, include_non_auto)",
+            "    results = {}",
+        ]
+        for i, name in enumerate(order):
+            namespace[f"_m{i}"] = modules[i]
+            lines.append(f"    results[{name!r}] = _m{i}.start()")
+        lines.append('    self._log_results("启动完成", results)')
+        lines.append("    return results")
+        
+        code = compile("\n".join(lines), f"<frozen start_all: {len(order)} modules>", "exec")
+        exec(code, namespace)
+        with self._lock:
+            # 生成期间模块集合有变化（register/unregister 已解除冻结）时放弃本次冻结
+            if [name for level in self._calculate_startup_levels() for name in level
+                    if self.modules[name].auto_start] != order:
+                logger.warning("⚠️ 冻结期间模块集合发生变化，已放弃冻结")
+                return
+            self.start_all = types.MethodType(namespace["_start_all_frozen"], self)
+        
+        logger.info(f"🧊 模块注册表已冻结: {len(order)} 个自动启动模块")
+    
+    def unfreeze(self):
+        """解除冻结，恢复按拓扑层级启动的 start_all"""
+        if "start_all" in self.__dict__:
+            del self.start_all
+    
     def stop_all(self, reverse_order: bool = True) -> Dict[str, bool]:
         """
         停止所有模块
         
         Args:
-            reverse_order: 是否按反向顺序停止
+            reverse_order: 是否按反向顺序停止（parallel_start 为True时同层模块并行停止）
             
         Returns:
             每个模块的停止结果
         """
+        with self._lock:
+            levels = self._calculate_startup_levels()
         if reverse_order:
-            order = list(reversed(self._calculate_startup_order()))
-        else:
-            order = self._calculate_startup_order()
+            levels = [list(reversed(level)) for level in reversed(levels)]
+        
+        results = self._run_by_level(levels, self.stop_module)
         
-        results = {}
-        for name in order:
-            results[name] = self.stop_module(name)
-            time.sleep(0.1)
+        self._log_results("停止完成", results)
+        return results
+    
+    def _log_results(self, title: str, results: Dict[str, bool]):
+        """
+        把批量操作的汇总和逐个模块的结果合成一条日志输出
+        
+        Args:
+            title: 汇总标题
+            results: 每个模块的执行结果
+        """
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
+        lines = [f"📊 {title}: {sum(results.values())}/{len(results)} 个模块成功"]
+        lines.extend(f"  {'✅' if ok else '❌'} {name}" for name, ok in results.items())
+        logger.info("\n".join(lines))
+    
+    def _run_by_level(self, levels: List[List[str]], action: Callable[[str], bool]) -> Dict[str, bool]:
+        """
+        逐层执行模块操作：parallel_start 为True时同层模块并行执行，上一层全部完成后再进入下一层；
+        否则按层级和层内顺序依次执行
+        
+        Args:
+            levels: 按层级分组的模块名称
+            action: 对单个模块执行的操作
+            
+        Returns:
+            每个模块的执行结果（按层级和层内顺序排列）
+        """
+        results: Dict[str, bool] = {}
+        width = max((len(level) for level in levels), default=0)
+        if width <= 1 or not self.parallel_start:
+            for level in levels:
+                for name in level:
+                    results[name] = action(name)
+            return results
+        
+        with ThreadPoolExecutor(max_workers=min(32, width), thread_name_prefix="module-registry") as executor:
+            for level in levels:
+                if len(level) == 1:
+                    results[level[0]] = action(level[0])
+                    continue
+                
+                futures = [executor.submit(action, name) for name in level]
+                for name, future in zip(level, futures):
+                    results[name] = future.result()
         
-        logger.info(f"📊 停止完成: {sum(results.values())}/{len(results)} 个模块成功")
         return results
     
     def list_modules(self) -> List[str]:
@@ -327,10 +776,15 @@ class EnhancedModuleRegistry:
         """获取所有模块状态"""
         status = {}
         for name, info in self.modules.items():
+            module = info.module
+            state = module.state
+            state_value = _STATE_VALUES.get(state)
+            if state_value is None:
+                state_value = state.value if hasattr(state, 'value') else str(state)
             status[name] = {
                 "name": name,
-                "version": info.module.version if hasattr(info.module, 'version') else "unknown",
-                "state": info.module.state.value if hasattr(info.module.state, 'value') else str(info.module.state),
+                "version": module.version if info.has_version else "unknown",
+                "state": state_value,
                 "dependencies": info.dependencies,
                 "auto_start": info.auto_start,
                 "priority": info.priority
@@ -345,9 +799,17 @@ class EnhancedModuleRegistry:
             健康检查结果
         """
         total = len(self.modules)
-        active = sum(1 for m in self.modules.values() if m.module.state == ModuleState.ACTIVE)
-        stopped = sum(1 for m in self.modules.values() if m.module.state == ModuleState.STOPPED)
-        error = sum(1 for m in self.modules.values() if m.module.state == ModuleState.ERROR)
+        active = stopped = error = 0
+        
+        # 单次遍历统计各状态（枚举成员按身份比较）
+        for info in self.modules.values():
+            state = info.module.state
+            if state is _ACTIVE:
+                active += 1
+            elif state is _STOPPED:
+                stopped += 1
+            elif state is _ERROR:
+                error += 1
         
         return {
             "total": total,
@@ -360,14 +822,18 @@ class EnhancedModuleRegistry:
 
 # 全局模块注册表实例
 _global_registry: Optional[EnhancedModuleRegistry] = None
+_global_registry_lock = threading.Lock()
 
 
+# 由 lru_cache 缓存，命中时不经过Python层判断；首次调用在锁内创建，多线程同时首次调用也只创建一个实例
+@lru_cache(maxsize=None)
 def get_module_registry() -> EnhancedModuleRegistry:
     """获取全局模块注册表实例"""
     global _global_registry
-    if _global_registry is None:
-        _global_registry = EnhancedModuleRegistry()
-    return _global_registry
+    with _global_registry_lock:
+        if _global_registry is None:
+            _global_registry = EnhancedModuleRegistry()
+        return _global_registry
 
 
 if __name__ == "__main__":
@@ -5,9 +5,18 @@
 
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import ClassVar, List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,21 +46,94 @@ class ETAResult:
         }
 
 
+def _hour_period(hour: int) -> Tuple[str, int]:
+    """小时 -> (时段, 播报用小时数)"""
+    # 判断上午/下午/晚上
+    if hour < 6:
+        return "凌晨", hour
+    elif hour < 12:
+        return "上午", hour
+    elif hour < 14:
+        return "中午", hour
+    elif hour < 18:
+        return "下午", hour - 12 if hour > 12 else hour
+    else:
+        return "晚上", hour - 12
+
+
+# 时段名称（批量格式化时以下标表示）
+_PERIOD_NAMES: Tuple[str, ...] = ("凌晨", "上午", "中午", "下午", "晚上")
+
+
+def _bucket_hours(hours, periods_out, hours_out):
+    """
+    批量计算时段下标和播报用小时数（纯数值运算，可被Numba编译）
+    
+    Args:
+        hours: 小时数组（0-23）
+        periods_out: 输出的时段下标数组（对应_PERIOD_NAMES）
+        hours_out: 输出的播报用小时数组
+    """
+    for i in range(hours.shape[0]):
+        h = hours[i]
+        if h < 6:
+            periods_out[i] = 0
+            hours_out[i] = h
+        elif h < 12:
+            periods_out[i] = 1
+            hours_out[i] = h
+        elif h < 14:
+            periods_out[i] = 2
+            hours_out[i] = h
+        elif h < 18:
+            periods_out[i] = 3
+            hours_out[i] = h - 12 if h > 12 else h
+        else:
+            periods_out[i] = 4
+            hours_out[i] = h - 12
+
+
+if NUMBA_AVAILABLE:
+    _bucket_hours = njit(cache=True)(_bucket_hours)
+
+
 class ETACalculator:
     """ETA计算器"""
     
+    # 默认速度（米/分钟）
+    _SPEED_MAP: ClassVar[Dict[str, int]] = {
+        "walk": 70,    # 约4.2公里/小时
+        "bus": 400,    # 约24公里/小时
+        "metro": 800,  # 约48公里/小时
+    }
+    
+    # 等待时间估算（分钟）
+    _WAIT_MAP: ClassVar[Dict[str, int]] = {
+        "bus": 5,
+        "metro": 3,
+    }
+    
+    # 按小时预先计算的时段和播报小时数
+    _HOUR_PERIOD: ClassVar[Tuple[str, ...]] = tuple(_hour_period(h)[0] for h in range(24))
+    _HOUR_DISPLAY: ClassVar[Tuple[int, ...]] = tuple(_hour_period(h)[1] for h in range(24))
+    
+    # 无Numba时的批量查表数组
+    _HOUR_PERIOD_IDX: ClassVar[np.ndarray] = np.array(
+        [_PERIOD_NAMES.index(p) for p in _HOUR_PERIOD], dtype=np.int8)
+    _HOUR_DISPLAY_ARR: ClassVar[np.ndarray] = np.array(_HOUR_DISPLAY, dtype=np.int8)
+    
     def __init__(self):
         """初始化ETA计算器"""
         self.logger = logging.getLogger(__name__)
         
         # 默认速度（米/分钟）
-        self.walking_speed = 70  # 约4.2公里/小时
-        self.bus_speed = 400     # 约24公里/小时
-        self.metro_speed = 800   # 约48公里/小时
+        self.walking_speed = self._SPEED_MAP["walk"]
+        self.bus_speed = self._SPEED_MAP["bus"]
+        self.metro_speed = self._SPEED_MAP["metro"]
         
         # 等待时间估算（分钟）
-        self.bus_wait_time = 5
-        self.metro_wait_time = 3
+        self.bus_wait_time = self._WAIT_MAP["bus"]
+        self.metro_wait_time = self._WAIT_MAP["metro"]
         
         self.logger.info("⏰ ETA计算器初始化完成")
     
@@ -73,23 +155,19 @@ class ETACalculator:
         if current_time is None:
             current_time = datetime.now()
         
-        # 计算总耗时（分钟）
+        # 单条查询直接求和，不走批量路径的数组构造
         total_duration = sum(segment.duration_minutes for segment in segments)
         
         # 计算预计到达时间
         estimated_arrival = current_time + timedelta(minutes=total_duration)
         
-        # 格式化当前时间
         current_time_str = self._format_time(current_time)
-        
-        # 格式化预计到达时间
         arrival_time_str = self._format_time(estimated_arrival)
-        
-        # 格式化总耗时
         duration_str = self._format_duration(total_duration)
         
         # 构建播报消息
-        formatted_message = f"现在时间是{current_time_str}，预计耗时{duration_str}，您将于{arrival_time_str}抵达{destination}。"
+        formatted_message = "".join(("现在时间是", current_time_str, "，预计耗时", duration_str,
+                                     "，您将于", arrival_time_str, "抵达", destination, "。"))
         
         result = ETAResult(
             current_time=current_time,
@@ -102,6 +180,104 @@ class ETACalculator:
         
         return result
     
+    def calculate_eta_batch(self,
+                            segments_batch: List[List[RouteSegment]],
+                            destinations: List[str],
+                            current_time: Optional[datetime] = None) -> List[ETAResult]:
+        """
+        批量计算到达时间
+        
+        Args:
+            segments_batch: 每条查询的路线段列表
+            destinations: 每条查询的目的地（与segments_batch一一对应）
+            current_time: 当前时间（如果为None则使用系统时间）
+        
+        Returns:
+            List[ETAResult]: ETA计算结果列表
+        """
+        if len(segments_batch) != len(destinations):
+            raise ValueError("segments_batch 与 destinations 长度不一致")
+        
+        results = self._calculate_eta_rows(segments_batch, destinations, current_time)
+        
+        self.logger.info(f"⏰ 批量ETA计算完成: {len(results)}条")
+        
+        return results
+    
+    def _calculate_eta_rows(self,
+                            segments_batch: List[List[RouteSegment]],
+                            destinations: List[str],
+                            current_time: Optional[datetime]) -> List[ETAResult]:
+        """
+        批量计算的核心：耗时矩阵按行求和，到达时间用datetime64向量相加（单条查询不走此路径）
+        
+        Args:
+            segments_batch: 每条查询的路线段列表
+            destinations: 每条查询的目的地
+            current_time: 当前时间
+        
+        Returns:
+            List[ETAResult]: ETA计算结果列表
+        """
+        if current_time is None:
+            current_time = datetime.now()
+        
+        n = len(segments_batch)
+        if n == 0:
+            return []
+        
+        # 耗时矩阵（不足的列补0；用float64保留小数分钟，不做截断）
+        width = max(1, max(len(segments) for segments in segments_batch))
+        durations = np.zeros((n, width), dtype=np.float64)
+        # 每行耗时是否全为整数（是则总耗时以int返回，与单条计算的sum结果类型一致）
+        int_rows = [True] * n
+        for i, segments in enumerate(segments_batch):
+            if segments:
+                values = [segment.duration_minutes for segment in segments]
+                durations[i, :len(segments)] = values
+                int_rows[i] = all(isinstance(value, int) for value in values)
+        
+        # 计算总耗时（分钟）
+        totals = durations.sum(axis=1)
+        
+        # 计算预计到达时间（耗时四舍五入到微秒，与 timedelta(minutes=...) 一致；时区单独带回）
+        tzinfo = current_time.tzinfo
+        base = np.datetime64(current_time.replace(tzinfo=None), "us")
+        arrivals_np = base + np.rint(totals * 60_000_000).astype(np.int64).astype("timedelta64[us]")
+        arrivals = arrivals_np.tolist()
+        
+        # 到达时间的时/分（当天零点起的分钟数）
+        minute_of_day = (arrivals_np - arrivals_np.astype("datetime64[D]")).astype("timedelta64[m]").astype(np.int64)
+        arrival_strs = self.format_times_batch((minute_of_day // 60).astype(np.int8),
+                                               (minute_of_day % 60).astype(np.int8))
+        
+        # 当前时间只需格式化一次
+        current_time_str = self._format_time(current_time)
+        
+        results = []
+        for total, is_int, arrival, arrival_time_str, destination in zip(totals.tolist(), int_rows, arrivals,
+                                                                         arrival_strs, destinations):
+            if tzinfo is not None:
+                arrival = arrival.replace(tzinfo=tzinfo)
+            
+            if is_int:
+                total = int(total)
+            
+            duration_str = self._format_duration(total)
+            
+            # 构建播报消息
+            formatted_message = "".join(("现在时间是", current_time_str, "，预计耗时", duration_str,
+                                         "，您将于", arrival_time_str, "抵达", destination, "。"))
+            
+            results.append(ETAResult(
+                current_time=current_time,
+                total_duration_minutes=total,
+                estimated_arrival=arrival,
+                formatted_message=formatted_message
+            ))
+        
+        return results
+    
     def calculate_from_distance(self,
                                distance_meters: float,
                                route_type: str = "walk",
@@ -121,23 +297,13 @@ class ETACalculator:
             current_time = datetime.now()
         
         # 根据路线类型选择速度
-        speed_map = {
-            "walk": self.walking_speed,
-            "bus": self.bus_speed,
-            "metro": self.metro_speed
-        }
-        
-        speed = speed_map.get(route_type, self.walking_speed)
+        speed = self._SPEED_MAP.get(route_type, self.walking_speed)
         
         # 计算步行时间（分钟）
         walking_time = int(distance_meters / speed)
         
         # 如果是公交/地铁，添加等待时间
-        wait_time = 0
-        if route_type == "bus":
-            wait_time = self.bus_wait_time
-        elif route_type == "metro":
-            wait_time = self.metro_wait_time
+        wait_time = self._WAIT_MAP.get(route_type, 0)
         
         total_duration = walking_time + wait_time
         
@@ -149,7 +315,8 @@ class ETACalculator:
         arrival_time_str = self._format_time(estimated_arrival)
         duration_str = self._format_duration(total_duration)
         
-        formatted_message = f"现在时间是{current_time_str}，预计耗时{duration_str}，您将于{arrival_time_str}到达。"
+        formatted_message = "".join(("现在时间是", current_time_str, "，预计耗时", duration_str,
+                                     "，您将于", arrival_time_str, "到达。"))
         
         return ETAResult(
             current_time=current_time,
@@ -171,32 +338,48 @@ class ETACalculator:
         hour = dt.hour
         minute = dt.minute
         
-        # 判断上午/下午/晚上
-        if hour < 6:
-            period = "凌晨"
-            display_hour = hour
-        elif hour < 12:
-            period = "上午"
-            display_hour = hour
-        elif hour < 14:
-            period = "中午"
-            display_hour = hour
-        elif hour < 18:
-            period = "下午"
-            display_hour = hour - 12 if hour > 12 else hour
-        elif hour < 22:
-            period = "晚上"
-            display_hour = hour - 12
-        else:
-            period = "晚上"
-            display_hour = hour - 12
+        # 查表得到上午/下午/晚上
+        period = self._HOUR_PERIOD[hour]
+        display_hour = self._HOUR_DISPLAY[hour]
         
         if minute == 0:
             return f"{period}{display_hour}点"
         else:
             return f"{period}{display_hour}点{minute}分"
     
-    def _format_duration(self, minutes: int) -> str:
+    def format_times_batch(self, hours: np.ndarray, minutes: np.ndarray) -> List[str]:
+        """
+        批量格式化时间为中文播报格式
+        
+        时段/小时的数值部分在Numba可用时走编译后的循环，否则查表；
+        字符串拼接留在Python侧。
+        
+        Args:
+            hours: 小时数组（int8，0-23）
+            minutes: 分钟数组（int8，0-59）
+        
+        Returns:
+            List[str]: 格式化的时间字符串列表
+        """
+        hours = np.asarray(hours, dtype=np.int8)
+        
+        if NUMBA_AVAILABLE:
+            periods = np.empty(hours.shape[0], dtype=np.int8)
+            display_hours = np.empty(hours.shape[0], dtype=np.int8)
+            _bucket_hours(hours, periods, display_hours)
+        else:
+            periods = self._HOUR_PERIOD_IDX[hours]
+            display_hours = self._HOUR_DISPLAY_ARR[hours]
+        
+        names = _PERIOD_NAMES
+        return [
+            f"{names[p]}{h}点" if m == 0 else f"{names[p]}{h}点{m}分"
+            for p, h, m in zip(periods.tolist(), display_hours.tolist(), np.asarray(minutes).tolist())
+        ]
+    
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _format_duration(minutes: int) -> str:
         """
         格式化耗时
         
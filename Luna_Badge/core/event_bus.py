@@ -6,16 +6,20 @@ Luna Badge 事件总线模块
 用于模块间的消息传递和事件调度，特别是TTS播报
 """
 
+import asyncio
 import logging
-import queue
 import threading
-from typing import Dict, Any, Callable, Optional, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
-import json
 
 logger = logging.getLogger(__name__)
 
+# 停止信号：入队后分发协程处理完之前的事件即退出
+_SHUTDOWN_SENTINEL = object()
+
 class EventType(Enum):
     """事件类型"""
     TTS_BROADCAST = "tts_broadcast"       # TTS播报事件
@@ -26,7 +30,9 @@ class EventType(Enum):
 
 @dataclass
 class Event:
-    """事件"""
+    """事件（__slots__ 省去每个实例的 __dict__）"""
+    __slots__ = ("event_type", "data", "timestamp", "source")
+    
     event_type: EventType
     data: Dict[str, Any]
     timestamp: float
@@ -48,11 +54,17 @@ class EventBus:
         """初始化事件总线"""
         self.logger = logging.getLogger(__name__)
         
-        # 事件队列
-        self.event_queue = queue.Queue()
+        # 事件循环（在工作线程中运行）与事件队列（在循环线程内首次入队时创建）
+        self._loop = asyncio.new_event_loop()
+        self._async_queue: Optional[asyncio.Queue] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
+        
+        # 同步处理器统一在这一个线程中按订阅顺序依次执行（与原先单工作线程的语义一致）
+        self._handler_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="event-bus-handler")
         
-        # 订阅者字典：{event_type: [handlers]}
-        self.subscribers: Dict[EventType, List[Callable]] = {}
+        # 订阅者字典：{event_type: (handlers,)}，元组只在订阅时重建
+        self.subscribers: Dict[EventType, Tuple[Callable, ...]] = {}
+        self._subscribers_version = 0
         
         # 工作线程
         self.running = False
@@ -71,11 +83,10 @@ class EventBus:
             event_type: 事件类型
             handler: 处理函数
         """
-        if event_type not in self.subscribers:
-            self.subscribers[event_type] = []
-        
-        self.subscribers[event_type].append(handler)
-        self.logger.debug(f"📡 订阅事件: {event_type.value}")
+        self.subscribers[event_type] = self.subscribers.get(event_type, ()) + (handler,)
+        self._subscribers_version += 1
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"📡 订阅事件: {event_type.value}")
     
     def publish(self, event_type: EventType, data: Dict[str, Any], source: str = "unknown"):
         """
@@ -86,15 +97,17 @@ class EventBus:
             data: 事件数据
             source: 事件源
         """
-        event = Event(
-            event_type=event_type,
-            data=data,
-            timestamp=time.time(),
-            source=source
-        )
+        # 总线未运行时事件循环不会消费回调，直接丢弃以免回调无限堆积
+        if not self.running:
+            self.logger.warning(f"⚠️ 事件总线未运行，丢弃事件: {event_type.value}")
+            return
         
-        self.event_queue.put(event)
-        self.logger.debug(f"📡 发布事件: {event_type.value} from {source}")
+        event = Event(event_type, data, time.time(), source)
+        
+        # 线程安全地交给事件循环入队
+        self._loop.call_soon_threadsafe(self._enqueue, event)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"📡 发布事件: {event_type.value} from {source}")
     
     def broadcast_tts(self, text: str, style: str = "default", **kwargs):
         """
@@ -121,6 +134,8 @@ class EventBus:
             return
         
         self.running = True
+        if self._dispatch_task is None:
+            self._loop.call_soon_threadsafe(self._start_dispatch)
         self.worker_thread = threading.Thread(target=self._worker, daemon=True)
         self.worker_thread.start()
         self.logger.info("📡 事件总线已启动")
@@ -129,37 +144,96 @@ class EventBus:
         """停止事件总线"""
         self.running = False
         if self.worker_thread:
+            self._loop.call_soon_threadsafe(self._enqueue, _SHUTDOWN_SENTINEL)
             self.worker_thread.join(timeout=1.0)
         self.logger.info("📡 事件总线已停止")
     
     def _worker(self):
-        """工作线程"""
-        while self.running:
+        """工作线程：运行事件循环直到 stop()"""
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+    
+    def _get_async_queue(self) -> asyncio.Queue:
+        """获取事件队列（仅在循环线程内调用）"""
+        if self._async_queue is None:
+            self._async_queue = asyncio.Queue()
+        return self._async_queue
+    
+    def _enqueue(self, event: Any):
+        """事件入队（仅在循环线程内调用）"""
+        self._get_async_queue().put_nowait(event)
+    
+    def _start_dispatch(self):
+        """创建分发任务（仅在循环线程内调用）"""
+        if self._dispatch_task is None:
+            self._dispatch_task = self._loop.create_task(self._dispatch())
+    
+    async def _dispatch(self):
+        """分发协程：逐个取出事件，按订阅顺序依次交给处理器；取到停止信号后停止事件循环"""
+        event_queue = self._get_async_queue()
+        
+        # 缓存上一个事件类型的处理器（同类事件常常成批到达），订阅变化时失效
+        last_type = None
+        last_handlers: Tuple[Callable, ...] = ()
+        last_version = -1
+        
+        while True:
+            event = await event_queue.get()
+            if event is _SHUTDOWN_SENTINEL:
+                break
+            
             try:
-                # 从队列获取事件
-                event = self.event_queue.get(timeout=1.0)
+                event_type = event.event_type
+                if event_type is not last_type or last_version != self._subscribers_version:
+                    last_type = event_type
+                    last_handlers = self.subscribers.get(event_type, ())
+                    last_version = self._subscribers_version
                 
-                # 分发给订阅者
-                if event.event_type in self.subscribers:
-                    for handler in self.subscribers[event.event_type]:
-                        try:
-                            handler(event)
-                        except Exception as e:
-                            self.logger.error(f"⚠️ 事件处理失败: {e}")
+                calls = [(handler, event, "事件处理失败") for handler in last_handlers]
                 
                 # 特殊处理TTS事件
-                if event.event_type == EventType.TTS_BROADCAST and self.tts_handler:
-                    try:
-                        self.tts_handler(event.data)
-                    except Exception as e:
-                        self.logger.error(f"⚠️ TTS处理失败: {e}")
-                
-                self.event_queue.task_done()
+                if event_type is EventType.TTS_BROADCAST and self.tts_handler:
+                    calls.append((self.tts_handler, event.data, "TTS处理失败"))
                 
-            except queue.Empty:
-                continue
+                if calls:
+                    await self._invoke_in_order(calls)
             except Exception as e:
                 self.logger.error(f"⚠️ 事件总线错误: {e}")
+        
+        self._dispatch_task = None
+        self._loop.stop()
+    
+    async def _invoke_in_order(self, calls: list):
+        """
+        按顺序调用处理器：协程函数直接await，连续的普通函数合并为一次提交，
+        在处理器线程中依次执行，不阻塞事件循环
+        
+        Args:
+            calls: (处理函数, 参数, 失败时的日志前缀) 列表
+        """
+        sync_batch = []
+        for call in calls:
+            if asyncio.iscoroutinefunction(call[0]):
+                if sync_batch:
+                    await self._loop.run_in_executor(self._handler_executor, self._run_sync_handlers, sync_batch)
+                    sync_batch = []
+                handler, arg, error_message = call
+                try:
+                    await handler(arg)
+                except Exception as e:
+                    self.logger.error(f"⚠️ {error_message}: {e}")
+            else:
+                sync_batch.append(call)
+        if sync_batch:
+            await self._loop.run_in_executor(self._handler_executor, self._run_sync_handlers, sync_batch)
+    
+    def _run_sync_handlers(self, calls: list):
+        """在处理器线程中依次执行普通处理函数"""
+        for handler, arg, error_message in calls:
+            try:
+                handler(arg)
+            except Exception as e:
+                self.logger.error(f"⚠️ {error_message}: {e}")
     
     def set_tts_handler(self, handler: Callable):
         """设置TTS处理器"""
@@ -168,7 +242,6 @@ class EventBus:
 
 
 # 全局事件总线实例
-import time
 global_event_bus = EventBus()
 
 def get_event_bus() -> EventBus:
@@ -9,13 +9,147 @@ Luna Badge 公共设施识别模块
 import logging
 import cv2
 import numpy as np
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Pattern, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import re
+import hashlib
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+# OpenCV 8位 BGR->HSV 的定点运算参数（与 cv2.cvtColor 的结果逐像素一致）
+_HSV_SHIFT = 12
+_HSV_SDIV = np.array([0] + [round((255 << _HSV_SHIFT) / i) for i in range(1, 256)], dtype=np.int32)
+_HSV_HDIV = np.array([0] + [round((180 << _HSV_SHIFT) / (6.0 * i)) for i in range(1, 256)], dtype=np.int32)
 
 logger = logging.getLogger(__name__)
 
+# OCR结果缓存条数上限
+_OCR_CACHE_SIZE = 512
+
+# 文字识别出椅子的置信度超过该值时，不再做形状检测
+_CONFIDENT_TEXT_THRESHOLD = 0.8
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _filter_contours(bboxes, areas, min_area, min_ratio, max_ratio):
+        """按面积和宽高比筛选轮廓（Numba并行版本），返回布尔掩码"""
+        keep = np.zeros(bboxes.shape[0], dtype=np.bool_)
+        for i in prange(bboxes.shape[0]):
+            if areas[i] < min_area:
+                continue
+            h = bboxes[i, 3]
+            ratio = bboxes[i, 2] / h if h > 0 else 0.0
+            keep[i] = min_ratio <= ratio <= max_ratio
+        return keep
+else:
+    def _filter_contours(bboxes, areas, min_area, min_ratio, max_ratio):
+        """按面积和宽高比筛选轮廓（NumPy向量化版本），返回布尔掩码"""
+        w = bboxes[:, 2].astype(np.float64)
+        h = bboxes[:, 3].astype(np.float64)
+        ratio = np.divide(w, h, out=np.zeros_like(w), where=h > 0)
+        return (areas >= min_area) & (ratio >= min_ratio) & (ratio <= max_ratio)
+
+
+def _classify_bgr_kernel(image, lut, sdiv, hdiv, out):
+    """
+    逐像素把BGR换算成HSV（OpenCV定点公式），并立即查表得到该像素所属的颜色范围位掩码
+    
+    Args:
+        image: (H,W,3) uint8 BGR图像
+        lut: (256,3) 每个通道的颜色范围位掩码表
+        sdiv: 饱和度除法表
+        hdiv: 色相除法表
+        out: (H,W) 输出的位掩码图
+    """
+    half = 1 << (_HSV_SHIFT - 1)
+    for y in prange(image.shape[0]):
+        for x in range(image.shape[1]):
+            b = np.int32(image[y, x, 0])
+            g = np.int32(image[y, x, 1])
+            r = np.int32(image[y, x, 2])
+            v = max(b, g, r)
+            diff = v - min(b, g, r)
+            s = (diff * sdiv[v] + half) >> _HSV_SHIFT
+            if v == r:
+                h = g - b
+            elif v == g:
+                h = b - r + 2 * diff
+            else:
+                h = r - g + 4 * diff
+            h = (h * hdiv[diff] + half) >> _HSV_SHIFT
+            if h < 0:
+                h += 180
+            out[y, x] = lut[h, 0] & lut[s, 1] & lut[v, 2]
+
+
+if NUMBA_AVAILABLE:
+    _classify_bgr_kernel = njit(parallel=True, cache=True)(_classify_bgr_kernel)
+
+
+def _build_trie_regex(keywords) -> str:
+    """
+    把关键词按公共前缀组织成字典树形式的正则（如 ["bus", "bus stop", "bench"] -> b(?:ench|us(?: stop)?)）
+    
+    同一节点的分支首字符互不相同，正则引擎在每个位置最多走一条路径，失配时立即放弃；
+    关键词的结束节点若还有子节点，则子分支为贪婪可选，因此每个位置返回最长的关键词。
+    
+    Args:
+        keywords: 关键词列表
+        
+    Returns:
+        str: 正则表达式（未编译）
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?"
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+    
+    return emit(trie)
+
+
+def _contour_stats(contours) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算轮廓的边界框和面积
+    
+    Args:
+        contours: cv2.findContours 返回的轮廓列表
+        
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: ((N,4) int32 边界框 x,y,w,h, (N,) float64 面积)
+    """
+    bboxes = np.array([cv2.boundingRect(contour) for contour in contours], dtype=np.int32).reshape(-1, 4)
+    areas = np.array([cv2.contourArea(contour) for contour in contours], dtype=np.float64)
+    return bboxes, areas
+
+
 class FacilityType(Enum):
     """公共设施类型枚举"""
     CHAIR = "chair"               # 椅子
@@ -29,7 +163,9 @@ class FacilityType(Enum):
 
 @dataclass
 class FacilityResult:
-    """公共设施识别结果"""
+    """公共设施识别结果（__slots__ 省去每个实例的 __dict__）"""
+    __slots__ = ("type", "label", "confidence", "bbox", "center", "features")
+    
     type: FacilityType                   # 类型
     label: str                           # 标签文字（如具体名称）
     confidence: float                    # 置信度 (0-1)
@@ -48,6 +184,18 @@ class FacilityResult:
             "features": self.features
         }
 
+@dataclass
+class _ColorTables:
+    """颜色范围表（按行平铺，每行对应一个 (设施类型, 颜色范围) 组合）"""
+    lowers: np.ndarray       # (K,3) uint8 各通道下界
+    uppers: np.ndarray       # (K,3) uint8 各通道上界
+    types: np.ndarray        # (K,) int8 设施类型序号（_FACILITY_TYPES 的下标）
+    range_ids: np.ndarray    # (K,) int8 去重后的颜色范围编号（即位掩码中的位）
+    lut: np.ndarray          # (1,256,3) 每通道位掩码查找表
+
+# 设施类型序号 -> 设施类型
+_FACILITY_TYPES = tuple(FacilityType)
+
 class FacilityDetector:
     """公共设施检测器"""
     
@@ -136,6 +284,26 @@ class FacilityDetector:
             ]
         }
         
+        # OCR结果缓存：{(区域尺寸, 内容哈希): (文字, 类型, 置信度, 名称)}
+        self._ocr_cache: "OrderedDict[Tuple[Any, bytes], Tuple[str, FacilityType, float, str]]" = OrderedDict()
+        self._ocr_cache_lock = threading.Lock()
+        
+        # 文字区域搜索在半分辨率图像上进行（OCR仍使用原分辨率区域）
+        self.text_search_downsample = True
+        
+        # 文字、颜色特征、形状三种检测并发执行（主要耗时在释放GIL的OpenCV调用中）
+        self.parallel_detection = True
+        
+        # 有OpenCL设备时，颜色特征与形状检测的滤波阶段用 cv2.UMat 走 OpenCV T-API（在GPU上执行）
+        self.use_opencl = cv2.ocl.haveOpenCL()
+        # 线程池在首次并发检测时才创建，close() 时关闭
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        
+        # 形态学结构元素（只创建一次）
+        self._kernel3 = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        self._kernel5 = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+        
         # 形状特征（宽高比范围）
         self.shape_features = {
             FacilityType.CHAIR: (2.0, 5.0),      # 长条形
@@ -144,8 +312,67 @@ class FacilityDetector:
             FacilityType.SUBWAY: (0.8, 1.2),     # 圆形标识
         }
         
+        # 关键词匹配器、名称正则、颜色查找表在首次使用时才构建（cached_property），
+        # 修改 keywords / name_patterns / color_features 后删除对应属性即可重建
+        
         self.logger.info("🏛️ 公共设施检测器初始化完成")
     
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """获取并发检测线程池（首次使用时创建）"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="facility-detect")
+        return self._pool
+    
+    def close(self):
+        """关闭并发检测线程池（之后再检测会重新创建）"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+    
+    @cached_property
+    def _color_tables(self) -> _ColorTables:
+        """
+        颜色范围表：把 color_features 平铺成连续的 uint8 数组，并构建每通道位掩码查找表
+        
+        HSV范围是各通道独立的区间，因此"像素落在第k个范围内"等价于三个通道都落在各自区间内。
+        为每个通道建一张256项的位掩码表（第k位表示落在第k个范围的该通道区间内），
+        三个通道查表后按位与即得每个像素所属的全部范围。相同的范围只占一位。
+        
+        查表已是一次读取完成全部范围的分类，输出为单字节位掩码；不再先把HSV量化成
+        低位宽编码——粗粒度分桶无法表达现有的窄区间（如白色的 S 0–30）。
+        """
+        rows = [
+            (facility_type, color_range)
+            for facility_type, color_ranges in self.color_features.items()
+            for color_range in color_ranges
+        ]
+        ranges = np.array([color_range for _, color_range in rows], dtype=np.uint8).reshape(-1, 6)
+        unique_ranges, range_ids = np.unique(ranges, axis=0, return_inverse=True)
+        
+        if len(unique_ranges) <= 8:
+            dtype = np.uint8
+        elif len(unique_ranges) <= 16:
+            dtype = np.uint16
+        else:
+            dtype = np.int32
+        
+        # (256,K,3) 各通道取值是否落在第k个范围内，按位合并成 (256,3)
+        values = np.arange(256)[:, None, None]
+        in_range = (values >= unique_ranges[None, :, :3]) & (values <= unique_ranges[None, :, 3:])
+        bits = (1 << np.arange(len(unique_ranges)))[None, :, None]
+        lut = np.bitwise_or.reduce(np.where(in_range, bits, 0), axis=1).astype(dtype)[None]
+        
+        return _ColorTables(
+            lowers=np.ascontiguousarray(ranges[:, :3]),
+            uppers=np.ascontiguousarray(ranges[:, 3:]),
+            types=np.array([_FACILITY_TYPES.index(facility_type) for facility_type, _ in rows], dtype=np.int8),
+            range_ids=range_ids.reshape(-1).astype(np.int8),
+            lut=lut
+        )
+    
     def detect_facility(self, image: np.ndarray) -> List[FacilityResult]:
         """
         检测图像中的公共设施
@@ -159,20 +386,49 @@ class FacilityDetector:
         results = []
         
         try:
-            # 转换为HSV颜色空间用于颜色特征检测
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+            # 灰度图只转换一次，供文字和形状检测共用
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            shape_gray = gray
             
-            # 方法1: 基于文字识别
-            text_results = self._detect_by_text(image)
-            results.extend(text_results)
+            # 颜色特征检测的输入也在调用线程中准备好
+            if self.use_opencl:
+                # 图像上传一次，HSV转换、查表、形态学、Canny都在设备上进行，仅找轮廓前下载
+                u_image = cv2.UMat(image)
+                shape_gray = cv2.UMat(gray)
+                feature_args = (cv2.cvtColor(u_image, cv2.COLOR_BGR2HSV), image.shape)
+            elif NUMBA_AVAILABLE:
+                # HSV换算与颜色范围分类在同一个编译循环中完成，不生成中间HSV图像
+                feature_args = (None, image.shape, self._classify_bgr(image))
+            else:
+                feature_args = (cv2.cvtColor(image, cv2.COLOR_BGR2HSV), image.shape)
+            
+            # 方法1: 基于文字识别；方法2: 基于颜色和形状特征（两者并发）
+            if self.parallel_detection:
+                feature_future = self._get_pool().submit(self._detect_by_features, *feature_args)
+                text_results = self._detect_by_text(image, gray)
+            else:
+                feature_future = None
+                text_results = self._detect_by_text(image, gray)
             
-            # 方法2: 基于颜色和形状特征
-            feature_results = self._detect_by_features(hsv, image.shape)
-            results.extend(feature_results)
+            # 方法3: 基于形状检测（椅子、长椅等）——文字已可靠识别出椅子时跳过Canny和轮廓查找
+            need_shape = not any(
+                result.type is FacilityType.CHAIR and result.confidence > _CONFIDENT_TEXT_THRESHOLD
+                for result in text_results
+            )
+            shape_future = None
+            if need_shape and self.parallel_detection:
+                shape_future = self._get_pool().submit(self._detect_by_shape, image, shape_gray)
             
-            # 方法3: 基于形状检测（椅子、长椅等）
-            shape_results = self._detect_by_shape(image)
-            results.extend(shape_results)
+            # 按 文字、特征、形状 的顺序收集结果，保证合并去重的结果与顺序执行一致
+            results.extend(text_results)
+            if feature_future is not None:
+                results.extend(feature_future.result())
+            else:
+                results.extend(self._detect_by_features(*feature_args))
+            if shape_future is not None:
+                results.extend(shape_future.result())
+            elif need_shape:
+                results.extend(self._detect_by_shape(image, shape_gray))
             
             # 去重 - 合并位置相近的结果
             results = self._merge_nearby_results(results)
@@ -187,12 +443,13 @@ class FacilityDetector:
         
         return results
     
-    def _detect_by_text(self, image: np.ndarray) -> List[FacilityResult]:
+    def _detect_by_text(self, image: np.ndarray, gray: Optional[np.ndarray] = None) -> List[FacilityResult]:
         """
         基于文字识别公共设施
         
         Args:
             image: 输入图像
+            gray: 灰度图（可选，未提供时从image转换）
             
         Returns:
             List[FacilityResult]: 文字识别结果
@@ -201,43 +458,47 @@ class FacilityDetector:
         
         try:
             # 图像预处理
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if gray is None:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            
+            # 文字区域只需粗定位：在半分辨率图像上搜索，像素量减为1/4
+            if self.text_search_downsample:
+                search = cv2.pyrDown(gray)
+                scale = 2
+            else:
+                search = gray
+                scale = 1
             
             # 二值化
-            _, binary = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
+            _, binary = cv2.threshold(search, 127, 255, cv2.THRESH_BINARY)
             
-            # 形态学操作，突出文字区域
-            kernel = np.ones((3, 3), np.uint8)
-            binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+            # 形态学操作，突出文字区域（原地进行）
+            cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self._kernel3, dst=binary)
             
-            # 查找轮廓
-            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # 连通域标记：一次调用得到所有区域的边界框和像素面积（第0行是背景）
+            _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+            bboxes = np.ascontiguousarray(stats[1:, :4])
+            areas = stats[1:, cv2.CC_STAT_AREA].astype(np.float64)
             
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                
-                # 过滤太小的区域
-                if area < 500:
-                    continue
-                
-                # 获取边界框
-                x, y, w, h = cv2.boundingRect(contour)
+            # 批量过滤太小的区域（面积阈值按原分辨率500像素换算）
+            keep = _filter_contours(bboxes, areas, 500.0 / (scale * scale), -np.inf, np.inf)
+            
+            img_h, img_w = gray.shape[:2]
+            for index in np.flatnonzero(keep).tolist():
+                # 获取边界框（换算回原分辨率并裁剪到图像内）
+                x, y, w, h = (bboxes[index] * scale).tolist()
+                w = min(w, img_w - x)
+                h = min(h, img_h - y)
                 
                 # 提取文字区域
                 text_roi = gray[y:y+h, x:x+w]
                 
-                # OCR识别 (简化版)
-                text = self._simple_text_recognition(text_roi)
+                # OCR识别 + 关键词匹配 + 名称提取（按区域内容缓存）
+                text, facility_type, confidence, label = self._recognize_region(text_roi)
                 
                 if not text:
                     continue
                 
-                # 匹配关键词
-                facility_type, confidence = self._match_keywords(text)
-                
-                # 提取具体名称
-                label = self._extract_name(text, facility_type)
-                
                 if facility_type != FacilityType.UNKNOWN:
                     result = FacilityResult(
                         type=facility_type,
@@ -254,13 +515,30 @@ class FacilityDetector:
         
         return results
     
-    def _detect_by_features(self, hsv: np.ndarray, img_shape: Tuple[int, int]) -> List[FacilityResult]:
+    def _classify_bgr(self, image: np.ndarray) -> np.ndarray:
+        """
+        直接从BGR图像计算每个像素所属的颜色范围（按位表示），结果与先转HSV再查表一致
+        
+        Args:
+            image: 输入图像 (BGR格式, uint8)
+            
+        Returns:
+            np.ndarray: (H,W) 颜色范围位掩码图
+        """
+        lut = np.ascontiguousarray(self._color_tables.lut[0])
+        range_bits = np.empty(image.shape[:2], dtype=lut.dtype)
+        _classify_bgr_kernel(np.ascontiguousarray(image), lut, _HSV_SDIV, _HSV_HDIV, range_bits)
+        return range_bits
+    
+    def _detect_by_features(self, hsv: Optional[np.ndarray], img_shape: Tuple[int, int],
+                            range_bits: Optional[np.ndarray] = None) -> List[FacilityResult]:
         """
         基于颜色和形状特征识别
         
         Args:
-            hsv: HSV颜色空间图像
+            hsv: HSV颜色空间图像（np.ndarray 或 cv2.UMat；提供 range_bits 时可为None）
             img_shape: 图像尺寸
+            range_bits: 预先算好的颜色范围位掩码图（可选）
             
         Returns:
             List[FacilityResult]: 特征检测结果
@@ -268,66 +546,83 @@ class FacilityDetector:
         results = []
         
         try:
-            for facility_type, color_ranges in self.color_features.items():
-                for color_range in color_ranges:
+            tables = self._color_tables
+            
+            # 一次查表得到每个像素所属的颜色范围（按位表示）
+            if range_bits is None:
+                h_bits, s_bits, v_bits = cv2.split(cv2.LUT(hsv, tables.lut))
+                range_bits = cv2.bitwise_and(cv2.bitwise_and(h_bits, s_bits), v_bits)
+            
+            # 多个设施类型共用的颜色范围只计算一次轮廓
+            contours_by_range: Dict[int, Any] = {}
+            
+            # 掩码缓冲区由首次调用分配，之后在本次调用的所有颜色范围间复用
+            # （不放在self上，保证多线程调用安全；ndarray 与 UMat 输入都适用）
+            masked_bits = None
+            mask = None
+            
+            for facility_index, range_id in zip(tables.types.tolist(), tables.range_ids.tolist()):
+                facility_type = _FACILITY_TYPES[facility_index]
+                contours = contours_by_range.get(range_id)
+                if contours is None:
                     # 创建颜色掩码
-                    lower = np.array(color_range[:3])
-                    upper = np.array(color_range[3:])
-                    mask = cv2.inRange(hsv, lower, upper)
+                    masked_bits = cv2.bitwise_and(range_bits, 1 << range_id, dst=masked_bits)
+                    mask = cv2.compare(masked_bits, 0, cv2.CMP_NE, dst=mask)
                     
                     # 形态学操作
-                    kernel = np.ones((5, 5), np.uint8)
-                    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+                    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self._kernel5, dst=mask)
                     
                     # 查找轮廓
                     contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                    contours_by_range[range_id] = contours
+                
+                for contour in contours:
+                    area = cv2.contourArea(contour)
                     
-                    for contour in contours:
-                        area = cv2.contourArea(contour)
-                        
-                        # 过滤太小的区域
-                        if area < 1000:
-                            continue
-                        
-                        # 获取边界框
-                        x, y, w, h = cv2.boundingRect(contour)
-                        
-                        # 判断形状特征
-                        aspect_ratio = w / h if h > 0 else 0
-                        confidence = 0.6  # 基础置信度
-                        
-                        # 根据形状特征调整置信度
-                        if facility_type in self.shape_features:
-                            min_ratio, max_ratio = self.shape_features[facility_type]
-                            if min_ratio <= aspect_ratio <= max_ratio:
-                                confidence = 0.8
+                    # 过滤太小的区域
+                    if area < 1000:
+                        continue
+                    
+                    # 获取边界框
+                    x, y, w, h = cv2.boundingRect(contour)
+                    
+                    # 判断形状特征
+                    aspect_ratio = w / h if h > 0 else 0
+                    confidence = 0.6  # 基础置信度
+                    
+                    # 根据形状特征调整置信度
+                    if facility_type in self.shape_features:
+                        min_ratio, max_ratio = self.shape_features[facility_type]
+                        if min_ratio <= aspect_ratio <= max_ratio:
+                            confidence = 0.8
+                    
+                    if confidence > 0.6:
+                        result = FacilityResult(
+                            type=facility_type,
+                            label=facility_type.value,
+                            confidence=confidence,
+                            bbox=(x, y, w, h),
+                            center=(x + w // 2, y + h // 2),
+                            features={
+                                "detection_method": "color_shape",
+                                "aspect_ratio": aspect_ratio,
+                                "area": area
+                            }
+                        )
+                        results.append(result)
                         
-                        if confidence > 0.6:
-                            result = FacilityResult(
-                                type=facility_type,
-                                label=facility_type.value,
-                                confidence=confidence,
-                                bbox=(x, y, w, h),
-                                center=(x + w // 2, y + h // 2),
-                                features={
-                                    "detection_method": "color_shape",
-                                    "aspect_ratio": aspect_ratio,
-                                    "area": area
-                                }
-                            )
-                            results.append(result)
-                            
         except Exception as e:
             self.logger.error(f"特征检测失败: {e}")
         
         return results
     
-    def _detect_by_shape(self, image: np.ndarray) -> List[FacilityResult]:
+    def _detect_by_shape(self, image: np.ndarray, gray: Optional[np.ndarray] = None) -> List[FacilityResult]:
         """
         基于形状检测（如长椅、椅子）
         
         Args:
             image: 输入图像
+            gray: 灰度图（np.ndarray 或 cv2.UMat，可选，未提供时从image转换）
             
         Returns:
             List[FacilityResult]: 形状检测结果
@@ -336,7 +631,8 @@ class FacilityDetector:
         
         try:
             # 转换为灰度图
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if gray is None:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             
             # 边缘检测
             edges = cv2.Canny(gray, 50, 150)
@@ -344,38 +640,76 @@ class FacilityDetector:
             # 查找轮廓
             contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                
-                # 过滤太小的区域
-                if area < 2000:
-                    continue
-                
+            # 批量筛选：面积足够大且为长条形（可能是长椅）
+            bboxes, areas = _contour_stats(contours)
+            keep = _filter_contours(bboxes, areas, 2000.0, 3.0, 10.0)
+            
+            for index in np.flatnonzero(keep).tolist():
                 # 获取边界框
-                x, y, w, h = cv2.boundingRect(contour)
+                x, y, w, h = bboxes[index].tolist()
+                area = float(areas[index])
                 aspect_ratio = w / h if h > 0 else 0
                 
-                # 检测长条形物体（可能是长椅）
-                if 3.0 <= aspect_ratio <= 10.0:
-                    result = FacilityResult(
-                        type=FacilityType.CHAIR,
-                        label="长椅",
-                        confidence=0.75,
-                        bbox=(x, y, w, h),
-                        center=(x + w // 2, y + h // 2),
-                        features={
-                            "detection_method": "shape",
-                            "aspect_ratio": aspect_ratio,
-                            "area": area
-                        }
-                    )
-                    results.append(result)
-                    
+                result = FacilityResult(
+                    type=FacilityType.CHAIR,
+                    label="长椅",
+                    confidence=0.75,
+                    bbox=(x, y, w, h),
+                    center=(x + w // 2, y + h // 2),
+                    features={
+                        "detection_method": "shape",
+                        "aspect_ratio": aspect_ratio,
+                        "area": area
+                    }
+                )
+                results.append(result)
+                
         except Exception as e:
             self.logger.error(f"形状检测失败: {e}")
         
         return results
     
+    def _recognize_region(self, text_roi: np.ndarray) -> Tuple[str, FacilityType, float, str]:
+        """
+        识别文字区域并匹配设施类型，结果按区域内容哈希缓存（LRU）
+        
+        连续帧中同一块站牌/导览牌的像素往往完全相同，命中缓存即可跳过OCR。
+        
+        Args:
+            text_roi: 文字区域图像
+            
+        Returns:
+            Tuple[str, FacilityType, float, str]: (文字, 类型, 置信度, 名称)，未识别出文字时文字为空串
+        """
+        digest = hashlib.blake2b(np.ascontiguousarray(text_roi).data, digest_size=8)
+        key = (text_roi.shape, digest.digest())
+        
+        with self._ocr_cache_lock:
+            cached = self._ocr_cache.get(key)
+            if cached is not None:
+                self._ocr_cache.move_to_end(key)
+                return cached
+        
+        # OCR识别 (简化版)
+        text = self._simple_text_recognition(text_roi)
+        
+        if text:
+            # 匹配关键词
+            facility_type, confidence = self._match_keywords(text)
+            
+            # 提取具体名称
+            label = self._extract_name(text, facility_type)
+        else:
+            facility_type, confidence, label = FacilityType.UNKNOWN, 0.0, ""
+        
+        entry = (text, facility_type, confidence, label)
+        with self._ocr_cache_lock:
+            self._ocr_cache[key] = entry
+            if len(self._ocr_cache) > _OCR_CACHE_SIZE:
+                self._ocr_cache.popitem(last=False)
+        
+        return entry
+    
     def _simple_text_recognition(self, text_roi: np.ndarray) -> str:
         """
         简单的文字识别 (模拟OCR)
@@ -390,6 +724,40 @@ class FacilityDetector:
         # 实际实现应该调用OCR库
         return ""
     
+    @cached_property
+    def _keyword_matcher(self) -> Tuple[Any, Optional[Pattern], Dict[str, Tuple]]:
+        """
+        把关键词表编译成多模式匹配器，一次扫描文本即可找出所有命中的关键词
+        
+        优先使用 Aho–Corasick 自动机（pyahocorasick）；缺少该依赖时退化为预编译正则，
+        正则（按前缀组织成字典树）在每个位置只返回最长的关键词，其前缀关键词的条目预先合并到该关键词下。
+        
+        Returns:
+            (自动机或None, 正则或None, {关键词: 条目})
+        """
+        # 小写关键词 -> [(原始顺序, 类型序号, 关键词长度)]，同分时取原始顺序靠前者
+        entries: Dict[str, List[Tuple[int, int, int]]] = {}
+        order = 0
+        for facility_type, keywords in self.keywords.items():
+            type_index = _FACILITY_TYPES.index(facility_type)
+            for keyword in keywords:
+                entries.setdefault(keyword.lower(), []).append((order, type_index, len(keyword)))
+                order += 1
+        
+        if AHOCORASICK_AVAILABLE:
+            automaton = ahocorasick.Automaton()
+            for keyword, keyword_entries in entries.items():
+                automaton.add_word(keyword, tuple(keyword_entries))
+            automaton.make_automaton()
+            return automaton, None, {}
+        else:
+            kw_entries = {
+                keyword: tuple(sorted(entry for prefix, prefix_entries in entries.items()
+                                      if keyword.startswith(prefix) for entry in prefix_entries))
+                for keyword in entries
+            }
+            return None, re.compile("(?=(" + _build_trie_regex(entries) + "))"), kw_entries
+    
     def _match_keywords(self, text: str) -> Tuple[FacilityType, float]:
         """
         匹配关键词确定设施类型
@@ -400,24 +768,47 @@ class FacilityDetector:
         Returns:
             Tuple[FacilityType, float]: (类型, 置信度)
         """
-        text_lower = text.lower()
-        
         max_confidence = 0.0
-        matched_type = FacilityType.UNKNOWN
         
-        for facility_type, keywords in self.keywords.items():
-            for keyword in keywords:
-                keyword_lower = keyword.lower()
-                if keyword_lower in text_lower:
-                    # 计算匹配度
-                    match_ratio = len(keyword) / len(text) if text else 0
-                    confidence = min(match_ratio * 1.5, 1.0)
-                    
-                    if confidence > max_confidence:
-                        max_confidence = confidence
-                        matched_type = facility_type
+        if not text:
+            return FacilityType.UNKNOWN, max_confidence
         
-        return matched_type, max_confidence
+        text_lower = text.lower()
+        text_len = len(text)
+        best_order = -1
+        matched_index = -1
+        
+        automaton, kw_regex, kw_entries = self._keyword_matcher
+        if automaton is not None:
+            matches = (keyword_entries for _, keyword_entries in automaton.iter(text_lower))
+        else:
+            matches = (kw_entries[m.group(1)] for m in kw_regex.finditer(text_lower))
+        
+        for keyword_entries in matches:
+            for order, type_index, keyword_len in keyword_entries:
+                # 计算匹配度
+                confidence = min(keyword_len / text_len * 1.5, 1.0)
+                
+                if confidence > max_confidence or (confidence == max_confidence and order < best_order):
+                    max_confidence = confidence
+                    matched_index = type_index
+                    best_order = order
+        
+        # 类型序号只在最后换回枚举
+        if matched_index < 0:
+            return FacilityType.UNKNOWN, max_confidence
+        return _FACILITY_TYPES[matched_index], max_confidence
+    
+    @cached_property
+    def _name_regex(self) -> Dict[FacilityType, Pattern]:
+        """
+        每种类型的名称模式合并成一个预编译正则：
+        各分支依次尝试，保持"先按模式顺序、再取最左匹配"的语义
+        """
+        return {
+            facility_type: re.compile("(?s)" + "|".join(f".*?{pattern}" for pattern in patterns))
+            for facility_type, patterns in self.name_patterns.items()
+        }
     
     def _extract_name(self, text: str, facility_type: FacilityType) -> str:
         """
@@ -430,14 +821,14 @@ class FacilityDetector:
         Returns:
             str: 提取的名称
         """
-        if facility_type not in self.name_patterns:
+        name_regex = self._name_regex.get(facility_type)
+        if name_regex is None:
             return facility_type.value
         
-        # 使用正则表达式提取名称
-        for pattern in self.name_patterns[facility_type]:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1)
+        # 使用正则表达式提取名称（一次匹配覆盖该类型的全部模式）
+        match = name_regex.match(text)
+        if match:
+            return next(group for group in match.groups() if group is not None)
         
         return facility_type.value
     
@@ -456,32 +847,58 @@ class FacilityDetector:
         if not results:
             return []
         
+        if threshold <= 0:
+            return list(results)
+        
+        # 按阈值大小划分网格：距离小于阈值的两个中心点一定落在相邻（3×3）格子内
+        threshold_sq = threshold * threshold
+        centers = [result.center for result in results]
+        grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        cells = []
+        for i, (cx, cy) in enumerate(centers):
+            cell = (int(cx // threshold), int(cy // threshold))
+            cells.append(cell)
+            grid[cell].append(i)
+        
+        # 簇的记录放在NumPy数组中：used 标记已被合并的结果
+        xs = np.array([center[0] for center in centers], dtype=np.float64)
+        ys = np.array([center[1] for center in centers], dtype=np.float64)
+        confidences = np.array([result.confidence for result in results], dtype=np.float64)
+        used = np.zeros(len(results), dtype=bool)
+        
         merged = []
-        used = set()
         
         for i, result in enumerate(results):
-            if i in used:
+            if used[i]:
                 continue
             
-            # 查找相近的结果
-            nearby = [result]
-            for j, other in enumerate(results):
-                if i != j and j not in used:
-                    # 计算中心点距离
-                    dx = result.center[0] - other.center[0]
-                    dy = result.center[1] - other.center[1]
-                    distance = np.sqrt(dx*dx + dy*dy)
-                    
-                    if distance < threshold:
-                        nearby.append(other)
-                        used.add(j)
-            
-            # 合并相近结果（保留置信度最高的）
-            if len(nearby) > 1:
-                best = max(nearby, key=lambda x: x.confidence)
-                merged.append(best)
-            else:
-                merged.append(nearby[0])
+            # 查找相近的结果（只比较相邻格子，按原顺序排列）
+            gx, gy = cells[i]
+            candidates = []
+            for nx in (gx - 1, gx, gx + 1):
+                for ny in (gy - 1, gy, gy + 1):
+                    candidates.extend(grid.get((nx, ny), ()))
+            if len(candidates) == 1:
+                merged.append(result)
+                continue
+            
+            candidates = np.sort(np.array(candidates, dtype=np.intp))
+            candidates = candidates[(candidates != i) & ~used[candidates]]
+            
+            # 比较中心点距离的平方
+            dx = xs[candidates] - xs[i]
+            dy = ys[candidates] - ys[i]
+            nearby = candidates[dx * dx + dy * dy < threshold_sq]
+            
+            if nearby.size == 0:
+                merged.append(result)
+                continue
+            
+            used[nearby] = True
+            
+            # 合并相近结果（保留置信度最高的，同分时取靠前者）
+            group = np.concatenate(([i], nearby))
+            merged.append(results[int(group[np.argmax(confidences[group])])])
         
         return merged
     
@@ -495,26 +912,28 @@ class FacilityDetector:
         Returns:
             Dict[str, Any]: 摘要信息
         """
-        summary = {
+        counts = Counter(result.type.value for result in results)
+        return {
             "total": len(results),
-            "by_type": {}
+            "by_type": dict(counts)
         }
-        
-        for result in results:
-            type_name = result.type.value
-            if type_name not in summary["by_type"]:
-                summary["by_type"][type_name] = 0
-            summary["by_type"][type_name] += 1
-        
-        return summary
 
 
-# 全局检测器实例
-global_facility_detector = FacilityDetector()
+# 全局检测器实例（首次使用时创建）
+_global_facility_detector: Optional[FacilityDetector] = None
+
+
+def get_facility_detector() -> FacilityDetector:
+    """获取全局公共设施检测器实例"""
+    global _global_facility_detector
+    if _global_facility_detector is None:
+        _global_facility_detector = FacilityDetector()
+    return _global_facility_detector
+
 
 def detect_facilities(image: np.ndarray) -> List[FacilityResult]:
     """检测公共设施的便捷函数"""
-    return global_facility_detector.detect_facility(image)
+    return get_facility_detector().detect_facility(image)
 
 
 if __name__ == "__main__":
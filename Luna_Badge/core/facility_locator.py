@@ -6,12 +6,17 @@
 import logging
 import os
 import json
+from math import radians, cos, sin, asin, sqrt
 from typing import Dict, Any, Optional, List, Tuple
-from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# 地球半径（米）
+_EARTH_RADIUS = 6371000
+
 
 class FacilityType(Enum):
     """设施类型"""
@@ -24,16 +29,30 @@ class FacilityType(Enum):
     HOSPITAL = "hospital"       # 医院
 
 
-@dataclass
 class FacilityPOI:
-    """设施POI信息"""
-    type: FacilityType
-    name: str
-    position: Tuple[float, float]  # (lat, lng)
-    distance_meters: float
-    has_toilet: bool = False  # 是否确认有洗手间
-    toilet_probability: float = 0.0  # 有洗手间的概率（0-1）
-    source: str = "map"  # 数据来源：map/inference/detection
+    """
+    设施POI信息
+    
+    使用 __slots__ 的普通类而非 dataclass：字段带默认值时 dataclass 无法手写 __slots__，
+    而 dataclass(slots=True) 需要 Python 3.10（嵌入式平台需兼容 Python 3.8）。
+    """
+    __slots__ = ("type", "name", "position", "distance_meters", "has_toilet", "toilet_probability", "source")
+    
+    def __init__(self,
+                 type: FacilityType,
+                 name: str,
+                 position: Tuple[float, float],
+                 distance_meters: float,
+                 has_toilet: bool = False,
+                 toilet_probability: float = 0.0,
+                 source: str = "map"):
+        self.type = type
+        self.name = name
+        self.position = position  # (lat, lng)
+        self.distance_meters = distance_meters
+        self.has_toilet = has_toilet  # 是否确认有洗手间
+        self.toilet_probability = toilet_probability  # 有洗手间的概率（0-1）
+        self.source = source  # 数据来源：map/inference/detection
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -72,8 +91,35 @@ class FacilityLocator:
         # POI数据存储（实际应从地图API获取）
         self.poi_data: List[Dict[str, Any]] = []
         
+        # 洗手间POI表（列式存储，便于一次性向量化计算距离）
+        # TODO: 实际应调用地图API（如高德、百度、OpenStreetMap），这里使用模拟数据
+        self._load_toilet_pois([
+            {
+                "name": "商场洗手间",
+                "position": (31.2310, 121.4740),
+                "type": FacilityType.TOILET
+            },
+            {
+                "name": "地铁站洗手间",
+                "position": (31.2320, 121.4750),
+                "type": FacilityType.TOILET
+            }
+        ])
+        
         self.logger.info("📍 设施定位器初始化完成")
     
+    def _load_toilet_pois(self, pois: List[Dict[str, Any]]):
+        """
+        载入洗手间POI，按列存储
+        
+        Args:
+            pois: POI列表，每项包含 name/position/type
+        """
+        self._poi_names: List[str] = [poi["name"] for poi in pois]
+        self._poi_positions: List[Tuple[float, float]] = [poi["position"] for poi in pois]
+        self._poi_lats = np.array([position[0] for position in self._poi_positions], dtype=np.float64)
+        self._poi_lngs = np.array([position[1] for position in self._poi_positions], dtype=np.float64)
+    
     def find_toilets(self,
                     current_position: Tuple[float, float],
                     radius: Optional[float] = None) -> List[FacilityPOI]:
@@ -123,35 +169,22 @@ class FacilityLocator:
         """
         toilets = []
         
-        # TODO: 实际应调用地图API（如高德、百度、OpenStreetMap）
-        # 这里使用模拟数据
-        
-        # 模拟数据示例
-        mock_toilets = [
-            {
-                "name": "商场洗手间",
-                "position": (31.2310, 121.4740),
-                "type": FacilityType.TOILET
-            },
-            {
-                "name": "地铁站洗手间",
-                "position": (31.2320, 121.4750),
-                "type": FacilityType.TOILET
-            }
-        ]
-        
-        for toilet_data in mock_toilets:
-            distance = self._calculate_distance(position, toilet_data["position"])
-            if distance <= radius:
-                toilets.append(FacilityPOI(
-                    type=FacilityType.TOILET,
-                    name=toilet_data["name"],
-                    position=toilet_data["position"],
-                    distance_meters=distance,
-                    has_toilet=True,
-                    toilet_probability=1.0,
-                    source="map"
-                ))
+        # 先用经纬度包围盒粗筛，只对包围盒内的POI计算Haversine距离
+        candidates = self._bbox_candidates(position, radius)
+        distances = self._haversine_vec(position[0], position[1],
+                                        self._poi_lats[candidates], self._poi_lngs[candidates])
+        
+        for index, distance in zip(candidates[distances <= radius].tolist(),
+                                   distances[distances <= radius].tolist()):
+            toilets.append(FacilityPOI(
+                type=FacilityType.TOILET,
+                name=self._poi_names[index],
+                position=self._poi_positions[index],
+                distance_meters=distance,
+                has_toilet=True,
+                toilet_probability=1.0,
+                source="map"
+            ))
         
         return toilets
     
@@ -234,9 +267,7 @@ class FacilityLocator:
                            pos1: Tuple[float, float],
                            pos2: Tuple[float, float]) -> float:
         """计算两点间距离（米）- Haversine公式"""
-        from math import radians, cos, sin, asin, sqrt
-        
-        R = 6371000
+        R = _EARTH_RADIUS
         lat1, lng1 = pos1
         lat2, lng2 = pos2
         
@@ -250,6 +281,62 @@ class FacilityLocator:
         
         return R * c
     
+    def _bbox_candidates(self,
+                         position: Tuple[float, float],
+                         radius: float) -> np.ndarray:
+        """
+        用经纬度包围盒筛选可能在搜索半径内的POI
+        
+        包围盒按球面上的精确外接范围计算（纬度 ±radius/R，经度 ±asin(sin(radius/R)/cos(lat))），
+        因此不会漏掉真正在半径内的POI；靠近极点时经度不做限制。
+        
+        Args:
+            position: 当前位置 (lat, lng)
+            radius: 搜索半径（米）
+        
+        Returns:
+            np.ndarray: 包围盒内POI的下标（升序）
+        """
+        lat0, lng0 = position
+        angular = radius / _EARTH_RADIUS * (1 + 1e-9)
+        dlat_max = np.degrees(angular)
+        
+        mask = np.abs(self._poi_lats - lat0) <= dlat_max
+        
+        sin_angular = sin(min(angular, np.pi / 2))
+        cos_lat0 = cos(radians(lat0))
+        if abs(lat0) + dlat_max < 90 and sin_angular < cos_lat0:
+            dlng_max = np.degrees(asin(sin_angular / cos_lat0))
+            # 经度差按 [-180, 180) 归一化，跨越180度经线时也能正确判断
+            dlng = (self._poi_lngs - lng0 + 180) % 360 - 180
+            mask &= np.abs(dlng) <= dlng_max
+        
+        return np.flatnonzero(mask)
+    
+    def _haversine_vec(self,
+                       lat0: float,
+                       lng0: float,
+                       lats: np.ndarray,
+                       lngs: np.ndarray) -> np.ndarray:
+        """
+        批量计算一个点到多个点的距离（米）- 向量化Haversine公式
+        
+        Args:
+            lat0: 起点纬度
+            lng0: 起点经度
+            lats: 终点纬度数组
+            lngs: 终点经度数组
+        
+        Returns:
+            np.ndarray: 距离数组
+        """
+        delta_lat = np.radians(lats - lat0)
+        delta_lng = np.radians(lngs - lng0)
+        
+        a = np.sin(delta_lat / 2) ** 2 + cos(radians(lat0)) * np.cos(np.radians(lats)) * np.sin(delta_lng / 2) ** 2
+        
+        return _EARTH_RADIUS * 2 * np.arcsin(np.sqrt(a))
+    
     def get_best_toilet_route(self,
                              current_position: Tuple[float, float]) -> Optional[FacilityPOI]:
         """
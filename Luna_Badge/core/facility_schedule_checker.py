@@ -6,82 +6,297 @@
 import logging
 import os
 import yaml
+import numpy as np
+from bisect import bisect_right
 from datetime import datetime, time as dt_time
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
+
+# 优先使用libyaml的C实现解析YAML
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# TOML配置（Python 3.11+ 自带 tomllib）
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+def _parse_minute_of_day(text: str) -> int:
+    """把 "HH:MM" 转换为当天的分钟数"""
+    hour, minute = text.split(':')
+    return int(hour) * 60 + int(minute)
+
+
+def _minute_of_day(value) -> float:
+    """
+    datetime / time 转换为当天的分钟数
+    
+    整分钟时返回整数；带秒时加上小数部分，保证与 time 对象直接比较的结果一致
+    （如 12:00:30 晚于 12:00 结束的时段）。
+    """
+    minute = value.hour * 60 + value.minute
+    if value.second or value.microsecond:
+        return minute + (value.second + value.microsecond / 1e6) / 60
+    return minute
+
+
+def _is_open_kernel(minutes, period_starts, period_ends, lunch_start, lunch_end, out):
+    """
+    批量判断营业状态（纯整数比较，可被Numba编译）
+    
+    Args:
+        minutes: 当天分钟数数组
+        period_starts: 各营业时段开始分钟数
+        period_ends: 各营业时段结束分钟数（含）
+        lunch_start: 午休开始分钟数
+        lunch_end: 午休结束分钟数（含；无午休时小于开始，为空区间）
+        out: 输出的布尔数组
+    """
+    for i in range(minutes.shape[0]):
+        minute = minutes[i]
+        is_open = False
+        for k in range(period_starts.shape[0]):
+            if period_starts[k] <= minute <= period_ends[k]:
+                is_open = True
+                break
+        if is_open and lunch_start <= minute <= lunch_end:
+            is_open = False
+        out[i] = is_open
+
+
+if NUMBA_AVAILABLE:
+    _is_open_kernel = njit(cache=True)(_is_open_kernel)
+
+
+# 当天分钟数 -> "HH:MM"
+_MIN_TO_HHMM = tuple(f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(1440))
+
+# 共用时段对象的缓存上限（按 (开始, 结束) 缓存，超出后淘汰最久未用的）
+_PERIOD_CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
 class SchedulePeriod:
-    """营业时段"""
+    """营业时段（不可变，可在各设施间共用）"""
     start: str  # "08:00"
     end: str    # "12:00"
     
+    def __post_init__(self):
+        # 起止时间只解析一次，之后都用当天分钟数比较
+        object.__setattr__(self, "_start_min", _parse_minute_of_day(self.start))
+        object.__setattr__(self, "_end_min", _parse_minute_of_day(self.end))
+    
+    @classmethod
+    def get(cls, start: str, end: str) -> "SchedulePeriod":
+        """获取时段对象（相同起止时间的时段在各设施间共用同一个对象）"""
+        if cls is SchedulePeriod:
+            return _shared_period(start, end)
+        return cls(start, end)
+    
     def contains(self, check_time: dt_time) -> bool:
-        """检查时间是否在时段内"""
-        start_parts = self.start.split(':')
-        end_parts = self.end.split(':')
-        start_time = dt_time(int(start_parts[0]), int(start_parts[1]))
-        end_time = dt_time(int(end_parts[0]), int(end_parts[1]))
-        
-        return start_time <= check_time <= end_time
+        """检查时间是否在时段内（含起止时刻）"""
+        return self._contains_minute(_minute_of_day(check_time))
+    
+    def _contains_minute(self, check_minute: float) -> bool:
+        """按当天分钟数检查是否在时段内"""
+        return self._start_min <= check_minute <= self._end_min
     
     def get_next_open_time(self, check_time: dt_time) -> Optional[str]:
         """获取下次开放时间"""
-        start_parts = self.start.split(':')
-        start_time = dt_time(int(start_parts[0]), int(start_parts[1]))
-        
-        if check_time < start_time:
-            return self.start
+        if _minute_of_day(check_time) < self._start_min:
+            return _MIN_TO_HHMM[self._start_min]
         
         return None
 
 
-@dataclass
+@lru_cache(maxsize=_PERIOD_CACHE_SIZE)
+def _shared_period(start: str, end: str) -> SchedulePeriod:
+    """按起止时间缓存的共用时段对象"""
+    return SchedulePeriod(start, end)
+
+
+@dataclass(frozen=True)
 class FacilitySchedule:
-    """设施营业时间表"""
+    """设施营业时间表（不可变：解析结果会被缓存并在多个检查器间共用）"""
     facility_type: str
-    periods: List[SchedulePeriod]
+    periods: Tuple[SchedulePeriod, ...]  # 传入列表时转换为元组
     lunch_break: Optional[SchedulePeriod] = None
     
+    def __post_init__(self):
+        periods = tuple(self.periods)
+        object.__setattr__(self, "periods", periods)
+        
+        # 各时段开始时间按先后排序，查找下次开放时间时二分即可
+        ordered = sorted(periods, key=lambda period: period._start_min)
+        object.__setattr__(self, "_sorted_starts", tuple(period._start_min for period in ordered))
+        object.__setattr__(self, "_sorted_start_strs", tuple(_MIN_TO_HHMM[period._start_min] for period in ordered))
+        
+        # 批量判断用的整数数组（只读；无午休时为空区间）
+        period_starts = np.array([period._start_min for period in periods], dtype=np.int32)
+        period_ends = np.array([period._end_min for period in periods], dtype=np.int32)
+        period_starts.flags.writeable = False
+        period_ends.flags.writeable = False
+        object.__setattr__(self, "_period_starts", period_starts)
+        object.__setattr__(self, "_period_ends", period_ends)
+        if self.lunch_break:
+            lunch = (self.lunch_break._start_min, self.lunch_break._end_min)
+        else:
+            lunch = (1, 0)
+        object.__setattr__(self, "_lunch_start", lunch[0])
+        object.__setattr__(self, "_lunch_end", lunch[1])
+    
     def is_open_now(self, check_time: Optional[dt_time] = None) -> bool:
-        """检查当前是否营业"""
+        """
+        检查当前是否营业
+        
+        Args:
+            check_time: 检查的时间，为None时使用系统时间
+        """
         if check_time is None:
             check_time = datetime.now().time()
-        
+        return self._is_open_minute(_minute_of_day(check_time))
+    
+    def _is_open_minute(self, check_minute: float) -> bool:
+        """按当天分钟数检查是否营业"""
         for period in self.periods:
-            if period.contains(check_time):
+            if period._contains_minute(check_minute):
                 # 检查是否在午休时间
-                if self.lunch_break and self.lunch_break.contains(check_time):
+                if self._lunch_start <= check_minute <= self._lunch_end:
                     return False
                 return True
         
         return False
     
+    def is_open_batch(self, minutes: np.ndarray) -> np.ndarray:
+        """
+        批量检查营业状态，结果与逐个调用 is_open_now 一致
+        
+        Args:
+            minutes: 当天分钟数数组
+        
+        Returns:
+            np.ndarray: 布尔数组
+        """
+        minutes = np.asarray(minutes, dtype=np.int32)
+        
+        if NUMBA_AVAILABLE:
+            out = np.empty(minutes.shape[0], dtype=np.bool_)
+            _is_open_kernel(minutes, self._period_starts, self._period_ends,
+                            self._lunch_start, self._lunch_end, out)
+            return out
+        
+        in_period = ((self._period_starts <= minutes[:, None]) & (minutes[:, None] <= self._period_ends)).any(axis=1)
+        in_lunch = (self._lunch_start <= minutes) & (minutes <= self._lunch_end)
+        return in_period & ~in_lunch
+    
     def get_next_open_time(self, check_time: Optional[dt_time] = None) -> Optional[str]:
         """获取下次开放时间"""
+        return self.status(check_time)[1]
+    
+    def status(self, check_time: Optional[dt_time] = None) -> Tuple[bool, Optional[str]]:
+        """
+        一次求出营业状态和下次开放时间
+        
+        Args:
+            check_time: 检查的时间，为None时使用系统时间
+        
+        Returns:
+            Tuple[bool, Optional[str]]: (是否营业, 下次开放时间；营业中时为None)
+        """
         if check_time is None:
             check_time = datetime.now().time()
+        check_minute = _minute_of_day(check_time)
         
-        # 如果当前在营业中，返回None
-        if self.is_open_now(check_time):
-            return None
+        # 如果当前在营业中，没有下次开放时间
+        if self._is_open_minute(check_minute):
+            return True, None
         
-        # 查找下一个营业时段
-        for period in self.periods:
-            next_time = period.get_next_open_time(check_time)
-            if next_time:
-                return next_time
+        return False, self._next_start(check_minute)
+    
+    def _next_start(self, check_minute: float) -> Optional[str]:
+        """非营业时间的下次开放时间"""
+        # 查找下一个营业时段（今天之后最早开始的时段）
+        index = bisect_right(self._sorted_starts, check_minute)
+        if index < len(self._sorted_starts):
+            return self._sorted_start_strs[index]
         
         # 如果今天没有，返回明天的第一个时段
         if self.periods:
-            return self.periods[0].start
+            return _MIN_TO_HHMM[self.periods[0]._start_min]
         
         return None
 
 
+# 小时 -> 时段名称
+_PERIOD_BY_HOUR = ("凌晨",) * 6 + ("上午",) * 6 + ("中午",) * 2 + ("下午",) * 4 + ("晚上",) * 6
+
+
+@lru_cache(maxsize=1440)
+def _format_time_hm(hour: int, minute: int) -> str:
+    """把时、分格式化为中文（一天只有1440种取值，结果缓存）"""
+    period = _PERIOD_BY_HOUR[hour]
+    display_hour = hour if hour <= 12 else hour - 12
+    if minute == 0:
+        return f"{period}{display_hour}点"
+    else:
+        return f"{period}{display_hour}点{minute}分"
+
+
+@lru_cache(maxsize=8)
+def _load_schedule_config(config_path: str, mtime: float) -> Dict[str, FacilitySchedule]:
+    """
+    解析营业时间配置文件（YAML，或扩展名为 .toml 的TOML文件）
+    
+    按 (路径, 修改时间) 缓存：重复创建检查器时不再重新解析YAML，文件修改后自动重新加载。
+    营业时间表不可变，可以共用；返回的字典由调用方复制后使用。
+    
+    Args:
+        config_path: 配置文件绝对路径
+        mtime: 配置文件修改时间
+    
+    Returns:
+        Dict[str, FacilitySchedule]: {设施类型: 营业时间表}
+    """
+    if config_path.endswith('.toml'):
+        if tomllib is None:
+            raise RuntimeError("当前Python版本不支持TOML配置（需要3.11+）")
+        with open(config_path, 'rb') as f:
+            config = tomllib.load(f)
+    else:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = yaml.load(f, Loader=_YamlLoader)
+    
+    schedules = {}
+    for facility_type, schedule_data in config.items():
+        periods = [
+            SchedulePeriod.get(p['start'], p['end'])
+            for p in schedule_data.get('periods', [])
+        ]
+        lunch = None
+        if 'lunch_break' in schedule_data:
+            lb_data = schedule_data['lunch_break']
+            lunch = SchedulePeriod.get(lb_data['start'], lb_data['end'])
+        schedules[facility_type] = FacilitySchedule(
+            facility_type=facility_type,
+            periods=periods,
+            lunch_break=lunch
+        )
+    return schedules
+
+
 class FacilityScheduleChecker:
     """公共设施营业时间检查器"""
     
@@ -100,26 +315,26 @@ class FacilityScheduleChecker:
             "hospital": FacilitySchedule(
                 facility_type="hospital",
                 periods=[
-                    SchedulePeriod("08:00", "12:00"),
-                    SchedulePeriod("14:00", "17:30")
+                    SchedulePeriod.get("08:00", "12:00"),
+                    SchedulePeriod.get("14:00", "17:30")
                 ],
-                lunch_break=SchedulePeriod("12:00", "14:00")
+                lunch_break=SchedulePeriod.get("12:00", "14:00")
             ),
             "government_office": FacilitySchedule(
                 facility_type="government_office",
                 periods=[
-                    SchedulePeriod("09:00", "12:00"),
-                    SchedulePeriod("13:30", "17:00")
+                    SchedulePeriod.get("09:00", "12:00"),
+                    SchedulePeriod.get("13:30", "17:00")
                 ],
-                lunch_break=SchedulePeriod("12:00", "13:30")
+                lunch_break=SchedulePeriod.get("12:00", "13:30")
             ),
             "bank": FacilitySchedule(
                 facility_type="bank",
                 periods=[
-                    SchedulePeriod("09:00", "12:00"),
-                    SchedulePeriod("14:00", "17:00")
+                    SchedulePeriod.get("09:00", "12:00"),
+                    SchedulePeriod.get("14:00", "17:00")
                 ],
-                lunch_break=SchedulePeriod("12:00", "14:00")
+                lunch_break=SchedulePeriod.get("12:00", "14:00")
             )
         }
         
@@ -130,22 +345,8 @@ class FacilityScheduleChecker:
         """加载营业时间配置"""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f)
-                    for facility_type, schedule_data in config.items():
-                        periods = [
-                            SchedulePeriod(p['start'], p['end'])
-                            for p in schedule_data.get('periods', [])
-                        ]
-                        lunch = None
-                        if 'lunch_break' in schedule_data:
-                            lb_data = schedule_data['lunch_break']
-                            lunch = SchedulePeriod(lb_data['start'], lb_data['end'])
-                        self.schedules[facility_type] = FacilitySchedule(
-                            facility_type=facility_type,
-                            periods=periods,
-                            lunch_break=lunch
-                        )
+                config_path = os.path.abspath(self.config_file)
+                self.schedules = dict(_load_schedule_config(config_path, os.path.getmtime(config_path)))
                 logger.info(f"✅ 已加载设施营业时间配置: {len(self.schedules)}个")
             except Exception as e:
                 logger.error(f"❌ 加载配置失败: {e}，使用默认配置")
@@ -180,12 +381,11 @@ class FacilityScheduleChecker:
                 "next_open_time": None
             }
         
-        check_time = current_time.time()
-        is_open = schedule.is_open_now(check_time)
-        next_open_time = schedule.get_next_open_time(check_time)
+        is_open, next_open_time = schedule.status(current_time.time())
         
         # 构建提示消息
         message = None
+        current_time_str = None
         if not is_open:
             current_time_str = self._format_time(current_time)
             if next_open_time:
@@ -198,30 +398,12 @@ class FacilityScheduleChecker:
             "facility_type": facility_type,
             "message": message,
             "next_open_time": next_open_time,
-            "current_time": current_time_str if not is_open else None
+            "current_time": current_time_str
         }
     
     def _format_time(self, dt: datetime) -> str:
         """格式化时间为中文"""
-        hour = dt.hour
-        minute = dt.minute
-        
-        if hour < 6:
-            period = "凌晨"
-        elif hour < 12:
-            period = "上午"
-        elif hour < 14:
-            period = "中午"
-        elif hour < 18:
-            period = "下午"
-        else:
-            period = "晚上"
-        
-        display_hour = hour if hour <= 12 else hour - 12
-        if minute == 0:
-            return f"{period}{display_hour}点"
-        else:
-            return f"{period}{display_hour}点{minute}分"
+        return _format_time_hm(dt.hour, dt.minute)
 
 
 # 全局设施时间检查器实例
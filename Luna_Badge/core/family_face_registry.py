@@ -6,16 +6,43 @@ Luna Badge 家庭脸部信息注册模块
 家人脸部信息注册与身份绑定
 """
 
+import atexit
 import logging
 import json
+import threading
 import time
 import os
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, asdict
+import re
+import weakref
+from typing import Dict, Any, Optional, List, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
 from enum import Enum
 import numpy as np
 import base64
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# JSON编解码（读写bytes）：有orjson时使用orjson，否则使用标准库
+if ORJSON_AVAILABLE:
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+else:
+    _json_loads = json.loads
+    
+    def _json_dumps(data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
 logger = logging.getLogger(__name__)
 
 class RelationshipType(Enum):
@@ -31,17 +58,119 @@ class RelationshipType(Enum):
     SPOUSE = "spouse"
     OTHER = "other"
 
+# 人脸特征向量维度
+_FEATURE_DIM = 128
+
+# 模拟特征向量用的随机数生成器
+_RNG = np.random.default_rng()
+
+# 修改后延迟保存的秒数（期间的多次修改合并为一次写盘）
+_SAVE_DELAY = 0.5
+
+# 人脸匹配的余弦相似度阈值
+_MATCH_THRESHOLD = 0.8
+
+# 关系关键词（按优先级排列）-> 关系类型
+_RELATIONSHIP_MAP = {
+    "妈": RelationshipType.MOTHER.value,
+    "爸": RelationshipType.FATHER.value,
+    "姐": RelationshipType.SISTER.value,
+    "哥": RelationshipType.BROTHER.value,
+    "爷爷": RelationshipType.GRANDFATHER.value,
+    "奶奶": RelationshipType.GRANDMOTHER.value,
+    "儿子": RelationshipType.SON.value,
+    "女儿": RelationshipType.DAUGHTER.value
+}
+
+# 关系关键词 -> 标签（其余关键词的标签为"家人"）
+_LABEL_MAP = {
+    "妈": "妈妈",
+    "爸": "爸爸",
+    "姐": "姐姐",
+    "哥": "哥哥"
+}
+
+_RELATIONSHIP_KEYWORDS = tuple(_RELATIONSHIP_MAP)
+_RELATIONSHIP_PRIORITY = {keyword: index for index, keyword in enumerate(_RELATIONSHIP_KEYWORDS)}
+
+# 一次扫描找出所有关键词（包括相互重叠的关键词）：
+# 优先使用 Aho–Corasick 自动机（载荷为优先级），缺少 pyahocorasick 时使用零宽前瞻正则
+if AHOCORASICK_AVAILABLE:
+    _RELATIONSHIP_AUTOMATON = ahocorasick.Automaton()
+    for _keyword, _priority in _RELATIONSHIP_PRIORITY.items():
+        _RELATIONSHIP_AUTOMATON.add_word(_keyword, _priority)
+    _RELATIONSHIP_AUTOMATON.make_automaton()
+    del _keyword, _priority
+    _RELATIONSHIP_RE = None
+else:
+    _RELATIONSHIP_AUTOMATON = None
+    _RELATIONSHIP_RE = re.compile("(?=(" + "|".join(map(re.escape, _RELATIONSHIP_KEYWORDS)) + "))")
+
 @dataclass
 class FamilyMember:
-    """家庭成员"""
+    """家庭成员（__slots__ 省去每个实例的 __dict__）"""
+    __slots__ = ("face_id", "label", "relationship", "nickname", "feature_vector",
+                 "registered_at", "confidence", "metadata")
+    
     face_id: str                     # 人脸ID
     label: str                       # 标签（如"妈妈"）
     relationship: str                # 关系类型
     nickname: Optional[str]          # 昵称
-    feature_vector: Optional[str]   # 特征向量（base64编码）
+    feature_vector: Optional[np.ndarray]  # 特征向量（float32，单独保存在 .npz 文件中）
     registered_at: str              # 注册时间
     confidence: float                # 注册置信度
     metadata: Dict[str, Any]        # 元数据
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（不含特征向量，特征向量单独保存）"""
+        return {
+            "face_id": self.face_id,
+            "label": self.label,
+            "relationship": self.relationship,
+            "nickname": self.nickname,
+            "registered_at": self.registered_at,
+            "confidence": self.confidence,
+            "metadata": self.metadata
+        }
+
+@lru_cache(maxsize=1)
+def _utc_timestamp_str(second: int) -> str:
+    """UTC时间戳字符串（同一秒内的批量注册只格式化一次）"""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(second))
+
+
+@lru_cache(maxsize=1)
+def _utc_date_str(day: int) -> str:
+    """UTC日期字符串（按天缓存）"""
+    return time.strftime("%Y%m%d", time.gmtime(day * 86400))
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """把每行单位化（零向量保持为零）"""
+    vectors = vectors.astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def _as_feature_vector(value: Any) -> Optional[np.ndarray]:
+    """把特征向量统一为float32数组（兼容旧格式的base64字符串）"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+# 存活的注册器（弱引用，不延长实例生命周期），进程退出时统一补写未保存的修改
+_live_registries: "weakref.WeakSet[FamilyFaceRegistry]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_registries():
+    """进程退出时写入所有注册器尚未保存的修改"""
+    for registry in list(_live_registries):
+        registry.flush()
+
 
 class FamilyFaceRegistry:
     """家庭脸部注册器"""
@@ -56,15 +185,41 @@ class FamilyFaceRegistry:
         self.logger = logging.getLogger(__name__)
         self.storage_file = storage_file
         
+        # 特征向量以原始float32保存在同名 _vectors.npz 中，JSON只存成员信息
+        self.vectors_file = os.path.splitext(storage_file)[0] + "_vectors.npz"
+        
         # 确保数据目录存在
         os.makedirs(os.path.dirname(storage_file), exist_ok=True)
         
         # 家庭成员数据库
         self.family_members: Dict[str, FamilyMember] = {}
         
+        # 特征矩阵：每行是一个成员的单位化特征向量，与 _face_ids 一一对应（没有特征的成员不在其中）
+        self._face_ids: List[str] = []
+        self._feature_matrix = np.empty((0, _FEATURE_DIM), dtype=np.float32)
+        
+        # 保护成员字典、特征矩阵和ID计数器（修改操作与保存快照互斥；锁顺序：_save_lock → _data_lock）
+        self._data_lock = threading.RLock()
+        
+        # 延迟保存：修改只标记为脏，由定时器合并写盘；退出时补写
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
+        
+        # 保存时是否fsync（断电后也不丢失已保存的数据，但写盘更慢）
+        self.fsync_on_save = False
+        _live_registries.add(self)
+        
         # 加载已有数据
         self._load_data()
         
+        # face_id序号计数器：从已有ID的最大序号继续，避免与已有成员重复
+        self._face_id_counter = max(
+            [len(self.family_members)] +
+            [int(face_id.rsplit("_", 1)[1]) for face_id in self.family_members
+             if face_id.rsplit("_", 1)[-1].isdigit()]
+        )
+        
         self.logger.info("👥 家庭脸部注册器初始化完成")
     
     def register_from_voice(self, voice_command: str, image: np.ndarray) -> Dict[str, Any]:
@@ -79,30 +234,30 @@ class FamilyFaceRegistry:
             Dict[str, Any]: 注册结果
         """
         # 解析语音命令
-        relationship = self._parse_relationship(voice_command)
-        label = self._parse_label(voice_command)
+        relationship, label = self._parse_voice_command(voice_command)
         
         # 提取人脸特征
         feature_vector = self._extract_face_features(image)
         
-        # 生成face_id
-        face_id = self._generate_face_id()
-        
-        # 创建家庭成员记录
-        member = FamilyMember(
-            face_id=face_id,
-            label=label,
-            relationship=relationship,
-            nickname=None,
-            feature_vector=feature_vector,
-            registered_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-            confidence=0.9,
-            metadata={}
-        )
-        
-        # 保存到数据库
-        self.family_members[face_id] = member
-        self._save_data()
+        with self._data_lock:
+            # 生成face_id
+            face_id = self._generate_face_id()
+            
+            # 创建家庭成员记录
+            member = FamilyMember(
+                face_id=face_id,
+                label=label,
+                relationship=relationship,
+                nickname=None,
+                feature_vector=feature_vector,
+                registered_at=_utc_timestamp_str(int(time.time())),
+                confidence=0.9,
+                metadata={}
+            )
+            
+            # 保存到数据库
+            self._add_member(member)
+        self._mark_dirty()
         
         self.logger.info(f"👥 已注册家人: {label} ({relationship})")
         
@@ -118,33 +273,36 @@ class FamilyFaceRegistry:
         return result
     
     def register_from_data(self, label: str, relationship: str, 
-                          feature_vector: str) -> FamilyMember:
+                          feature_vector: Any) -> FamilyMember:
         """
         从数据注册家人
         
         Args:
             label: 标签
             relationship: 关系类型
-            feature_vector: 特征向量
+            feature_vector: 特征向量（np.ndarray，或旧格式的base64字符串）
             
         Returns:
             FamilyMember: 家庭成员对象
         """
-        face_id = self._generate_face_id()
-        
-        member = FamilyMember(
-            face_id=face_id,
-            label=label,
-            relationship=relationship,
-            nickname=None,
-            feature_vector=feature_vector,
-            registered_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-            confidence=0.9,
-            metadata={}
-        )
+        feature_vector = _as_feature_vector(feature_vector)
         
-        self.family_members[face_id] = member
-        self._save_data()
+        with self._data_lock:
+            face_id = self._generate_face_id()
+            
+            member = FamilyMember(
+                face_id=face_id,
+                label=label,
+                relationship=relationship,
+                nickname=None,
+                feature_vector=feature_vector,
+                registered_at=_utc_timestamp_str(int(time.time())),
+                confidence=0.9,
+                metadata={}
+            )
+            
+            self._add_member(member)
+        self._mark_dirty()
         
         return member
     
@@ -159,24 +317,25 @@ class FamilyFaceRegistry:
         Returns:
             bool: 是否成功
         """
-        if face_id not in self.family_members:
-            self.logger.warning(f"⚠️ 找不到家庭成员: {face_id}")
-            return False
-        
-        member = self.family_members[face_id]
-        
-        # 更新字段
-        if "label" in updates:
-            member.label = updates["label"]
-        if "nickname" in updates:
-            member.nickname = updates["nickname"]
-        if "relationship" in updates:
-            member.relationship = updates["relationship"]
-        if "metadata" in updates:
-            member.metadata.update(updates["metadata"])
+        with self._data_lock:
+            if face_id not in self.family_members:
+                self.logger.warning(f"⚠️ 找不到家庭成员: {face_id}")
+                return False
+            
+            member = self.family_members[face_id]
+            
+            # 更新字段
+            if "label" in updates:
+                member.label = updates["label"]
+            if "nickname" in updates:
+                member.nickname = updates["nickname"]
+            if "relationship" in updates:
+                member.relationship = updates["relationship"]
+            if "metadata" in updates:
+                member.metadata.update(updates["metadata"])
         
         # 保存
-        self._save_data()
+        self._mark_dirty()
         
         self.logger.info(f"👥 已更新家庭成员: {face_id}")
         
@@ -188,42 +347,91 @@ class FamilyFaceRegistry:
     
     def list_all_members(self) -> List[FamilyMember]:
         """列出所有家庭成员"""
-        return list(self.family_members.values())
+        with self._data_lock:
+            return list(self.family_members.values())
     
-    def _parse_relationship(self, text: str) -> str:
-        """解析关系类型"""
-        relationship_map = {
-            "妈": RelationshipType.MOTHER.value,
-            "爸": RelationshipType.FATHER.value,
-            "姐": RelationshipType.SISTER.value,
-            "哥": RelationshipType.BROTHER.value,
-            "爷爷": RelationshipType.GRANDFATHER.value,
-            "奶奶": RelationshipType.GRANDMOTHER.value,
-            "儿子": RelationshipType.SON.value,
-            "女儿": RelationshipType.DAUGHTER.value
-        }
+    def find_match(self, query: np.ndarray, threshold: float = _MATCH_THRESHOLD) -> Optional[str]:
+        """
+        查找与人脸特征最相似的家庭成员
+        
+        Args:
+            query: 待匹配的特征向量
+            threshold: 余弦相似度阈值
+            
+        Returns:
+            Optional[str]: 匹配到的face_id，没有达到阈值的成员时返回None
+        """
+        # 特征矩阵与ID列表成对替换，在锁内取同一版本的快照
+        with self._data_lock:
+            face_ids = self._face_ids
+            feature_matrix = self._feature_matrix
+        if not face_ids:
+            return None
         
-        for keyword, relationship in relationship_map.items():
-            if keyword in text:
-                return relationship
+        query = _normalize_rows(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        
+        # 一次矩阵-向量乘法得到与所有成员的余弦相似度
+        scores = feature_matrix @ query
+        best = int(np.argmax(scores))
+        if scores[best] < threshold:
+            return None
+        return face_ids[best]
+    
+    def _add_member(self, member: FamilyMember):
+        """加入家庭成员，并同步特征矩阵（调用方持有 _data_lock）"""
+        face_id = member.face_id
+        replaced = face_id in self.family_members
+        self.family_members[face_id] = member
         
-        return RelationshipType.OTHER.value
+        if replaced:
+            self._rebuild_feature_matrix()
+        elif member.feature_vector is not None:
+            # 替换为新列表而不是原地追加，find_match 已取走的快照保持不变
+            self._face_ids = self._face_ids + [face_id]
+            self._feature_matrix = np.vstack((
+                self._feature_matrix, _normalize_rows(member.feature_vector.reshape(1, -1))
+            ))
+    
+    def _rebuild_feature_matrix(self):
+        """按当前成员重建特征矩阵"""
+        members = [member for member in self.family_members.values() if member.feature_vector is not None]
+        self._face_ids = [member.face_id for member in members]
+        if members:
+            self._feature_matrix = _normalize_rows(np.stack([member.feature_vector for member in members]))
+        else:
+            self._feature_matrix = np.empty((0, _FEATURE_DIM), dtype=np.float32)
+    
+    def _parse_voice_command(self, text: str) -> Tuple[str, str]:
+        """
+        一次扫描同时解析关系类型和标签
+        
+        Args:
+            text: 语音命令
+            
+        Returns:
+            Tuple[str, str]: (关系类型, 标签)
+        """
+        # 命中多个关键词时取关键词表中靠前的一个
+        if _RELATIONSHIP_AUTOMATON is not None:
+            matched = [priority for _, priority in _RELATIONSHIP_AUTOMATON.iter(text)]
+        else:
+            matched = [_RELATIONSHIP_PRIORITY[keyword] for keyword in _RELATIONSHIP_RE.findall(text)]
+        if not matched:
+            return RelationshipType.OTHER.value, "家人"
+        
+        keyword = _RELATIONSHIP_KEYWORDS[min(matched)]
+        return _RELATIONSHIP_MAP[keyword], _LABEL_MAP.get(keyword, "家人")
+    
+    def _parse_relationship(self, text: str) -> str:
+        """解析关系类型"""
+        return self._parse_voice_command(text)[0]
     
     def _parse_label(self, text: str) -> str:
         """解析标签"""
         # 简单提取，实际应该更智能
-        if "妈" in text:
-            return "妈妈"
-        elif "爸" in text:
-            return "爸爸"
-        elif "姐" in text:
-            return "姐姐"
-        elif "哥" in text:
-            return "哥哥"
-        else:
-            return "家人"
+        return self._parse_voice_command(text)[1]
     
-    def _extract_face_features(self, image: np.ndarray) -> str:
+    def _extract_face_features(self, image: np.ndarray) -> np.ndarray:
         """
         提取人脸特征向量
         
@@ -231,60 +439,117 @@ class FamilyFaceRegistry:
             image: 人脸图像
             
         Returns:
-            str: base64编码的特征向量
+            np.ndarray: 128维float32特征向量
         """
         # TODO: 实现真实的人脸特征提取（如使用face_recognition或DeepFace）
         # 这里返回模拟的特征向量
-        dummy_vector = np.random.rand(128).astype(np.float32)
-        
-        # 转换为base64
-        vector_bytes = dummy_vector.tobytes()
-        vector_base64 = base64.b64encode(vector_bytes).decode('utf-8')
-        
-        return vector_base64
+        return _RNG.random(_FEATURE_DIM, dtype=np.float32)
     
     def _generate_face_id(self) -> str:
         """生成人脸ID"""
-        count = len(self.family_members) + 1
-        timestamp = time.strftime("%Y%m%d", time.gmtime())
-        return f"face_{timestamp}_{count:03d}"
+        self._face_id_counter += 1
+        timestamp = _utc_date_str(int(time.time()) // 86400)
+        return f"face_{timestamp}_{self._face_id_counter:03d}"
     
     def _load_data(self):
         """加载数据"""
         if os.path.exists(self.storage_file):
             try:
-                with open(self.storage_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    for face_id, member_data in data.items():
-                        member = FamilyMember(**member_data)
-                        self.family_members[face_id] = member
+                with open(self.storage_file, 'rb') as f:
+                    data = _json_loads(f.read())
+                
+                vectors = {}
+                if os.path.exists(self.vectors_file):
+                    with np.load(self.vectors_file) as npz:
+                        vectors = {face_id: npz[face_id] for face_id in npz.files}
+                
+                for face_id, member_data in data.items():
+                    # 旧格式的JSON里直接存有base64特征向量，下次保存时迁移到 .npz
+                    legacy_vector = member_data.pop("feature_vector", None)
+                    member = FamilyMember(
+                        feature_vector=vectors.get(face_id, _as_feature_vector(legacy_vector)),
+                        **member_data
+                    )
+                    self.family_members[face_id] = member
                 
+                self._rebuild_feature_matrix()
                 self.logger.info(f"✅ 已加载 {len(self.family_members)} 个家庭成员")
             except Exception as e:
                 self.logger.error(f"⚠️ 加载数据失败: {e}")
     
+    def flush(self):
+        """立即写入尚未保存的修改"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._save_data()
+    
+    def close(self):
+        """写入尚未保存的修改，并不再参与退出时的补写"""
+        self.flush()
+        _live_registries.discard(self)
+    
+    def _mark_dirty(self):
+        """标记数据已修改，并（重新）开始延迟保存计时"""
+        with self._save_lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(_SAVE_DELAY, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def _sync_file(self, f):
+        """按需把文件内容刷到磁盘"""
+        if self.fsync_on_save:
+            f.flush()
+            os.fsync(f.fileno())
+    
     def _save_data(self):
-        """保存数据"""
+        """保存数据（先写临时文件再替换，避免写到一半时留下损坏的文件）"""
         try:
-            data = {}
-            for face_id, member in self.family_members.items():
-                data[face_id] = asdict(member)
+            # 在锁内生成快照（JSON在锁内序列化，元数据字典不会在序列化途中被修改），写盘在锁外进行
+            with self._data_lock:
+                data = {}
+                vectors = {}
+                for face_id, member in self.family_members.items():
+                    data[face_id] = member.to_dict()
+                    if member.feature_vector is not None:
+                        vectors[face_id] = member.feature_vector
+                payload = _json_dumps(data)
+            
+            tmp_file = self.storage_file + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(payload)
+                self._sync_file(f)
             
-            with open(self.storage_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            tmp_vectors_file = self.vectors_file + ".tmp"
+            with open(tmp_vectors_file, 'wb') as f:
+                np.savez(f, **vectors)
+                self._sync_file(f)
             
-            self.logger.debug(f"✅ 已保存 {len(self.family_members)} 个家庭成员")
+            os.replace(tmp_vectors_file, self.vectors_file)
+            os.replace(tmp_file, self.storage_file)
+            
+            self.logger.debug(f"✅ 已保存 {len(data)} 个家庭成员")
         except Exception as e:
             self.logger.error(f"⚠️ 保存数据失败: {e}")
 
 
-# 全局注册器实例
-global_family_registry = FamilyFaceRegistry()
+# 全局注册器实例（首次使用时创建）
+_global_family_registry: Optional[FamilyFaceRegistry] = None
+
 
 def get_family_registry() -> FamilyFaceRegistry:
     """获取家庭注册器实例"""
-    return global_family_registry
+    global _global_family_registry
+    if _global_family_registry is None:
+        _global_family_registry = FamilyFaceRegistry()
+    return _global_family_registry
 
 
 if __name__ == "__main__":
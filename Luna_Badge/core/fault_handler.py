@@ -7,17 +7,139 @@ Luna Badge 故障处理机制
 """
 
 import asyncio
+import atexit
+import itertools
 import logging
+import logging.handlers
+import queue
+import random
+import reprlib
+import sys
+import threading
 import traceback
 import time
-from typing import Dict, Any, Optional, Callable, List
+from collections import Counter, OrderedDict
+from typing import Dict, Any, Optional, Callable, List, Tuple
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from concurrent.futures import ThreadPoolExecutor
 import functools
 
 logger = logging.getLogger(__name__)
 
+# 日志队列容量，写满后丢弃新日志而不阻塞事件循环
+_LOG_QUEUE_SIZE = 10000
+
+# 异步日志监听线程（由应用日志配置显式启用）
+_log_queue: Optional[queue.Queue] = None
+_log_listener: Optional[logging.handlers.QueueListener] = None
+_log_queue_handler: Optional[logging.Handler] = None
+_log_target: Optional[logging.Logger] = None
+_log_moved_handlers: List[logging.Handler] = []
+_log_lock = threading.Lock()
+
+# 保留的故障记录上限，超出时优先淘汰最早的已解决故障
+_MAX_FAULTS = 1024
+
+# 重复故障去重窗口（秒）及缓存上限
+_DEDUP_TTL = 300.0
+_DEDUP_MAX_ENTRIES = 512
+
+# 恢复重试的指数退避参数（秒）：第n次重试等待 uniform(0, base * 2**n)，不超过上限
+_RETRY_BASE_DELAY = 1.0
+_RETRY_MAX_DELAY = 30.0
+
+# 熔断器参数：连续失败次数阈值、初始熔断窗口及窗口上限（秒）
+_BREAKER_FAILURE_THRESHOLD = 3
+_BREAKER_RECOVERY_WINDOW = 30.0
+_BREAKER_MAX_WINDOW = 600.0
+
+# 恢复隔舱参数：同时执行的恢复协程上限及等待队列深度
+_RECOVERY_CONCURRENCY = 4
+_RECOVERY_QUEUE_SIZE = 64
+
+# 故障上下文使用的截断repr：装饰器保存参数及按需格式化上下文时使用（兼容旧版本Python，逐项设置属性）
+_CONTEXT_REPR = reprlib.Repr()
+_CONTEXT_REPR.maxstring = 80
+_CONTEXT_REPR.maxother = 80
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """非阻塞队列日志处理器：队列满时丢弃日志，记录格式化交给监听线程完成"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 进程内队列无需序列化，直接传递原始记录，让监听线程再做 % 格式化
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def enable_async_logging(*handlers: logging.Handler,
+                         target: Optional[logging.Logger] = None) -> queue.Queue:
+    """
+    启用异步日志：把处理器交给后台QueueListener线程，避免磁盘I/O阻塞事件循环
+    
+    应在应用完成日志配置（如logging.basicConfig）之后显式调用一次。
+    target上原有的这些处理器被替换为一个非阻塞入队处理器，logger的propagate
+    设置保持不变，之后再添加到target上的处理器照常同步接收日志。
+    
+    Args:
+        handlers: 交给监听线程的处理器，默认使用target当前的全部处理器
+        target: 安装入队处理器的logger，默认为root logger
+        
+    Returns:
+        queue.Queue: 日志队列（重复调用时返回已有队列）
+    """
+    global _log_queue, _log_listener, _log_queue_handler, _log_target, _log_moved_handlers
+    
+    with _log_lock:
+        if _log_listener is not None:
+            return _log_queue
+        
+        target = target if target is not None else logging.getLogger()
+        moved = list(handlers) if handlers else list(target.handlers)
+        
+        _log_queue = queue.Queue(maxsize=_LOG_QUEUE_SIZE)
+        _log_queue_handler = _NonBlockingQueueHandler(_log_queue)
+        for handler in moved:
+            target.removeHandler(handler)
+        target.addHandler(_log_queue_handler)
+        
+        _log_listener = logging.handlers.QueueListener(
+            _log_queue, *moved, respect_handler_level=True
+        )
+        _log_listener.start()
+        _log_target = target
+        _log_moved_handlers = moved
+        return _log_queue
+
+
+def disable_async_logging():
+    """停止异步日志监听线程，写完队列中剩余日志并恢复原有处理器"""
+    global _log_queue, _log_listener, _log_queue_handler, _log_target, _log_moved_handlers
+    
+    with _log_lock:
+        if _log_listener is None:
+            return
+        
+        _log_listener.stop()
+        _log_target.removeHandler(_log_queue_handler)
+        for handler in _log_moved_handlers:
+            _log_target.addHandler(handler)
+        
+        _log_listener = None
+        _log_queue = None
+        _log_queue_handler = None
+        _log_target = None
+        _log_moved_handlers = []
+
+
+atexit.register(disable_async_logging)
+
 class FaultSeverity(Enum):
     """故障严重程度枚举"""
     LOW = "low"           # 低严重程度，不影响主要功能
@@ -37,6 +159,22 @@ class FaultType(Enum):
     DISK = "disk"                 # 磁盘故障
     UNKNOWN = "unknown"           # 未知故障
 
+class BreakerState(Enum):
+    """熔断器状态枚举"""
+    CLOSED = "closed"         # 正常，允许恢复
+    OPEN = "open"             # 熔断中，跳过恢复
+    HALF_OPEN = "half_open"   # 试探中，只允许一次恢复
+
+# 可重试的故障类型（瞬时性故障）；软件、内存等多为确定性错误，重试无意义
+_RETRIABLE_FAULT_TYPES = frozenset({
+    FaultType.NETWORK,
+    FaultType.HARDWARE,
+    FaultType.AI_MODEL,
+    FaultType.CAMERA,
+    FaultType.VOICE,
+    FaultType.DISK,
+})
+
 @dataclass
 class FaultInfo:
     """故障信息数据类"""
@@ -47,29 +185,80 @@ class FaultInfo:
     error_message: str
     error_code: str
     timestamp: float
-    stack_trace: str
     context: Dict[str, Any]
     recovery_attempts: int = 0
     max_recovery_attempts: int = 3
     is_resolved: bool = False
+    duplicate_count: int = 0
+    retriable: bool = True  # 设为False时只尝试恢复一次
+    # 堆栈跟踪文本：未传入时为None，首次调用 format_stack_trace() 时由 trace 格式化填充
+    stack_trace: Optional[str] = None
+    # 异常的帧摘要（不持有帧对象）
+    trace: Optional[traceback.TracebackException] = field(default=None, repr=False)
+    
+    def format_stack_trace(self) -> str:
+        """
+        获取堆栈跟踪文本，stack_trace 为空时由 trace 格式化并缓存
+        
+        Returns:
+            str: 堆栈跟踪文本（无异常时为空字符串）
+        """
+        if self.stack_trace is None and self.trace is not None:
+            self.stack_trace = "".join(self.trace.format())
+        return self.stack_trace or ""
+    
+    def context_repr(self, limit: int = 200) -> Dict[str, str]:
+        """
+        按需格式化上下文信息（上下文保存原始对象引用，仅在需要时截断输出）
+        
+        Args:
+            limit: 每项输出的最大字符数
+            
+        Returns:
+            Dict[str, str]: 截断后的上下文字符串
+        """
+        result = {}
+        for key, value in self.context.items():
+            text = value if isinstance(value, str) else _CONTEXT_REPR.repr(value)
+            if len(text) > limit:
+                text = text[:limit - 3] + "..."
+            result[key] = text
+        return result
 
 class FaultHandler:
     """故障处理器"""
     
     def __init__(self):
         """初始化故障处理器"""
-        self.faults: Dict[str, FaultInfo] = {}
+        self.faults: "OrderedDict[str, FaultInfo]" = OrderedDict()
         self.recovery_strategies: Dict[FaultType, Callable] = {}
         self.fault_callbacks: List[Callable[[FaultInfo], None]] = []
         self.is_handling_fault = False
         
+        # 故障ID序号（同一毫秒内的多次故障也不会重复）
+        self._id_ctr = itertools.count()
+        
+        # 重复故障去重缓存：(类型, 模块, 错误消息, 错误代码) -> (故障ID, 首次记录时间)
+        self._dedup: "OrderedDict[Tuple[FaultType, str, str, str], Tuple[str, float]]" = OrderedDict()
+        self._dedup_ttl = _DEDUP_TTL
+        
+        # 按故障类型的熔断器：连续恢复失败后在窗口期内跳过该类型的恢复
+        self._breakers: Dict[FaultType, Dict[str, Any]] = {}
+        
+        # 恢复隔舱：信号量限制并发，有界队列缓冲突发故障
+        # （异步原语需在事件循环内创建，首次调度恢复时按当前循环初始化）
+        self._recovery_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._recovery_sem: Optional[asyncio.Semaphore] = None
+        self._pending: Optional[asyncio.Queue] = None
+        self._recovery_tasks: set = set()
+        
         # 故障统计
         self.fault_stats = {
             "total_faults": 0,
             "resolved_faults": 0,
             "critical_faults": 0,
-            "faults_by_type": {},
-            "faults_by_severity": {}
+            "faults_by_type": Counter(),
+            "faults_by_severity": Counter()
         }
         
         # 注册默认恢复策略
@@ -129,8 +318,20 @@ class FaultHandler:
         if context is None:
             context = {}
         
+        # 窗口期内的重复故障只计数，不再记录、回调或重复调度恢复
+        now = time.time()
+        dedup_key = (fault_type, module_name, error_message, error_code)
+        cached = self._dedup.get(dedup_key)
+        if cached is not None:
+            cached_id, first_seen = cached
+            existing = self.faults.get(cached_id)
+            if existing is not None and not existing.is_resolved and now - first_seen < self._dedup_ttl:
+                existing.duplicate_count += 1
+                self._dedup.move_to_end(dedup_key)
+                return cached_id
+        
         # 生成故障ID
-        fault_id = f"{fault_type.value}_{int(time.time() * 1000)}"
+        fault_id = f"{fault_type.value}_{next(self._id_ctr):08x}"
         
         # 创建故障信息
         fault_info = FaultInfo(
@@ -140,13 +341,19 @@ class FaultHandler:
             module_name=module_name,
             error_message=error_message,
             error_code=error_code,
-            timestamp=time.time(),
-            stack_trace=traceback.format_exc(),
-            context=context
+            timestamp=now,
+            context=context,
+            trace=self._capture_trace()
         )
         
         # 记录故障
         self.faults[fault_id] = fault_info
+        if len(self.faults) > _MAX_FAULTS:
+            self._evict_faults()
+        self._dedup[dedup_key] = (fault_id, now)
+        self._dedup.move_to_end(dedup_key)
+        while len(self._dedup) > _DEDUP_MAX_ENTRIES:
+            self._dedup.popitem(last=False)
         
         # 更新统计信息
         self._update_fault_stats(fault_info)
@@ -165,16 +372,42 @@ class FaultHandler:
         if severity == FaultSeverity.CRITICAL:
             logger.error(f"🚨 严重故障: {fault_info.fault_id}")
             # 严重故障立即尝试恢复
-            asyncio.create_task(self._attempt_recovery(fault_info))
+            self._enqueue_recovery(fault_info)
         elif severity == FaultSeverity.HIGH:
             logger.warning(f"⚠️ 高严重程度故障: {fault_info.fault_id}")
             # 高严重程度故障延迟恢复
-            asyncio.create_task(self._delayed_recovery(fault_info, delay=2.0))
+            self._enqueue_recovery(fault_info, delay=2.0)
         else:
             logger.info(f"ℹ️ 故障记录: {fault_info.fault_id}")
         
         return fault_id
     
+    def _evict_faults(self):
+        """故障记录超出上限时淘汰最早的已解决故障（全部未解决时淘汰最早的一条）"""
+        while len(self.faults) > _MAX_FAULTS:
+            victim = next(
+                (fault_id for fault_id, fault in self.faults.items() if fault.is_resolved),
+                None
+            )
+            if victim is None:
+                self.faults.popitem(last=False)
+            else:
+                del self.faults[victim]
+    
+    @staticmethod
+    def _capture_trace() -> Optional[traceback.TracebackException]:
+        """
+        记录当前正在处理的异常的帧摘要
+        
+        Returns:
+            Optional[traceback.TracebackException]: 不在异常处理中时返回None
+        """
+        exc_type, exc_value, exc_tb = sys.exc_info()
+        if exc_type is None:
+            return None
+        # 不读取源码行，也不保留帧引用，格式化推迟到真正需要时
+        return traceback.TracebackException(exc_type, exc_value, exc_tb, lookup_lines=False)
+    
     def _update_fault_stats(self, fault_info: FaultInfo):
         """更新故障统计信息"""
         self.fault_stats["total_faults"] += 1
@@ -182,17 +415,9 @@ class FaultHandler:
         if fault_info.severity == FaultSeverity.CRITICAL:
             self.fault_stats["critical_faults"] += 1
         
-        # 按类型统计
-        fault_type = fault_info.fault_type.value
-        if fault_type not in self.fault_stats["faults_by_type"]:
-            self.fault_stats["faults_by_type"][fault_type] = 0
-        self.fault_stats["faults_by_type"][fault_type] += 1
-        
-        # 按严重程度统计
-        severity = fault_info.severity.value
-        if severity not in self.fault_stats["faults_by_severity"]:
-            self.fault_stats["faults_by_severity"][severity] = 0
-        self.fault_stats["faults_by_severity"][severity] += 1
+        # 按类型、严重程度统计
+        self.fault_stats["faults_by_type"][fault_info.fault_type.value] += 1
+        self.fault_stats["faults_by_severity"][fault_info.severity.value] += 1
     
     def _log_fault(self, fault_info: FaultInfo):
         """记录故障日志"""
@@ -211,45 +436,181 @@ class FaultHandler:
         else:
             logger.info(log_message)
         
-        # 记录详细堆栈跟踪
-        logger.debug(f"故障堆栈跟踪:\n{fault_info.stack_trace}")
+        # 记录详细堆栈跟踪及上下文（仅DEBUG级别时才格式化）
+        if logger.isEnabledFor(logging.DEBUG):
+            stack_trace = fault_info.format_stack_trace()
+            if stack_trace:
+                logger.debug("故障堆栈跟踪:\n%s", stack_trace)
+            if fault_info.context:
+                logger.debug("故障上下文: %s", fault_info.context_repr())
     
     async def _attempt_recovery(self, fault_info: FaultInfo):
-        """尝试恢复故障"""
+        """尝试恢复故障（失败时按指数退避加随机抖动重试）"""
         if fault_info.is_resolved:
             return
         
-        fault_info.recovery_attempts += 1
-        
-        logger.info(f"🔄 尝试恢复故障: {fault_info.fault_id} (第{fault_info.recovery_attempts}次)")
-        
         # 获取恢复策略
         recovery_strategy = self.recovery_strategies.get(fault_info.fault_type)
+        if recovery_strategy is None:
+            logger.warning(f"⚠️ 未找到恢复策略: {fault_info.fault_type.value}")
+            return
         
-        if recovery_strategy:
+        # 非瞬时性故障只执行一次恢复策略，不做重试
+        if fault_info.retriable and fault_info.fault_type in _RETRIABLE_FAULT_TYPES:
+            max_attempts = fault_info.max_recovery_attempts
+        else:
+            max_attempts = 1
+        
+        for attempt in range(max_attempts):
+            if not self._breaker_allow(fault_info.fault_type):
+                fault_info.context["recovery_status"] = "breaker_open"
+                logger.warning(f"⛔ 熔断中，跳过恢复: {fault_info.fault_id} ({fault_info.fault_type.value})")
+                return
+            
+            fault_info.recovery_attempts += 1
+            logger.info(f"🔄 尝试恢复故障: {fault_info.fault_id} (第{fault_info.recovery_attempts}次)")
+            
+            success = False
+            finished = False
             try:
                 success = await recovery_strategy(fault_info)
-                if success:
-                    fault_info.is_resolved = True
-                    self.fault_stats["resolved_faults"] += 1
-                    logger.info(f"✅ 故障恢复成功: {fault_info.fault_id}")
-                else:
-                    logger.warning(f"⚠️ 故障恢复失败: {fault_info.fault_id}")
+                finished = True
             except Exception as e:
                 logger.error(f"❌ 故障恢复异常: {fault_info.fault_id} - {e}")
-        else:
-            logger.warning(f"⚠️ 未找到恢复策略: {fault_info.fault_type.value}")
+                finished = True
+            finally:
+                if finished:
+                    self._breaker_record(fault_info.fault_type, bool(success))
+                else:
+                    # 被取消等异常退出：半开状态的试探按失败处理重新熔断，避免熔断器一直停在半开状态
+                    breaker = self._breakers.get(fault_info.fault_type)
+                    if breaker is not None and breaker["state"] == BreakerState.HALF_OPEN:
+                        self._breaker_record(fault_info.fault_type, False)
+            
+            if success:
+                fault_info.is_resolved = True
+                # 清零计数，避免同一故障再次发生时沿用旧的尝试次数
+                fault_info.recovery_attempts = 0
+                fault_info.context.pop("recovery_status", None)
+                self.fault_stats["resolved_faults"] += 1
+                logger.info(f"✅ 故障恢复成功: {fault_info.fault_id}")
+                return
+            logger.warning(f"⚠️ 故障恢复失败: {fault_info.fault_id}")
+
+            # 最后一次失败后不再等待
+            if attempt + 1 < max_attempts:
+                # 全抖动退避，避免多个模块同步重试
+                delay = min(_RETRY_MAX_DELAY, random.uniform(0, _RETRY_BASE_DELAY * (2 ** attempt)))
+                await asyncio.sleep(delay)
+    
+    def _breaker_allow(self, fault_type: FaultType) -> bool:
+        """
+        检查熔断器是否允许对该故障类型执行恢复
         
-        # 如果恢复失败且未达到最大尝试次数，继续尝试
-        if not fault_info.is_resolved and fault_info.recovery_attempts < fault_info.max_recovery_attempts:
-            await asyncio.sleep(5.0)  # 等待5秒后重试
-            await self._attempt_recovery(fault_info)
+        Args:
+            fault_type: 故障类型
+            
+        Returns:
+            bool: 是否允许执行恢复
+        """
+        breaker = self._breakers.get(fault_type)
+        if breaker is None or breaker["state"] == BreakerState.CLOSED:
+            return True
+        
+        if breaker["state"] == BreakerState.OPEN:
+            if time.monotonic() - breaker["opened_at"] < breaker["window"]:
+                return False
+            # 窗口期结束，进入半开状态放行一次试探
+            breaker["state"] = BreakerState.HALF_OPEN
+            return True
+        
+        # 半开状态下已有试探在进行
+        return False
+    
+    def _breaker_record(self, fault_type: FaultType, success: bool):
+        """
+        记录一次恢复结果并更新熔断器状态
+        
+        Args:
+            fault_type: 故障类型
+            success: 恢复是否成功
+        """
+        breaker = self._breakers.setdefault(fault_type, {
+            "state": BreakerState.CLOSED,
+            "failures": 0,
+            "opened_at": 0.0,
+            "window": _BREAKER_RECOVERY_WINDOW,
+        })
+        
+        if success:
+            breaker["state"] = BreakerState.CLOSED
+            breaker["failures"] = 0
+            breaker["window"] = _BREAKER_RECOVERY_WINDOW
+            return
+        
+        breaker["failures"] += 1
+        if breaker["state"] == BreakerState.HALF_OPEN:
+            # 试探失败，熔断窗口加倍
+            breaker["window"] = min(_BREAKER_MAX_WINDOW, breaker["window"] * 2)
+        elif breaker["failures"] < _BREAKER_FAILURE_THRESHOLD:
+            return
+        breaker["state"] = BreakerState.OPEN
+        breaker["opened_at"] = time.monotonic()
+        logger.warning(f"⛔ 故障类型 {fault_type.value} 恢复连续失败，熔断 {breaker['window']:.0f} 秒")
     
     async def _delayed_recovery(self, fault_info: FaultInfo, delay: float):
         """延迟恢复故障"""
         await asyncio.sleep(delay)
         await self._attempt_recovery(fault_info)
     
+    def _enqueue_recovery(self, fault_info: FaultInfo, delay: float = 0.0):
+        """
+        将故障放入恢复队列，由隔舱工作协程按并发上限执行
+        
+        Args:
+            fault_info: 故障信息
+            delay: 开始恢复前的延迟（秒）
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning(f"⚠️ 无运行中的事件循环，跳过恢复: {fault_info.fault_id}")
+            return
+        
+        if self._recovery_loop is not loop:
+            self._recovery_loop = loop
+            self._recovery_sem = asyncio.Semaphore(_RECOVERY_CONCURRENCY)
+            self._pending = asyncio.Queue(maxsize=_RECOVERY_QUEUE_SIZE)
+            self._track_task(loop.create_task(self._recovery_worker()))
+        
+        try:
+            self._pending.put_nowait((fault_info, delay))
+        except asyncio.QueueFull:
+            logger.warning(f"⚠️ 恢复队列已满，丢弃恢复请求: {fault_info.fault_id}")
+    
+    async def _recovery_worker(self):
+        """隔舱工作协程：取出恢复请求，获得并发名额后再启动恢复"""
+        while True:
+            fault_info, delay = await self._pending.get()
+            await self._recovery_sem.acquire()
+            self._track_task(asyncio.ensure_future(self._run_recovery(fault_info, delay)))
+    
+    async def _run_recovery(self, fault_info: FaultInfo, delay: float):
+        """执行一次恢复并释放并发名额"""
+        try:
+            if delay > 0:
+                await self._delayed_recovery(fault_info, delay)
+            else:
+                await self._attempt_recovery(fault_info)
+        finally:
+            self._recovery_sem.release()
+            self._pending.task_done()
+    
+    def _track_task(self, task: "asyncio.Task"):
+        """保留任务引用，防止运行中的任务被垃圾回收"""
+        self._recovery_tasks.add(task)
+        task.add_done_callback(self._recovery_tasks.discard)
+    
     # 默认恢复策略
     async def _recover_hardware_fault(self, fault_info: FaultInfo) -> bool:
         """恢复硬件故障"""
@@ -324,18 +685,33 @@ class FaultHandler:
         resolved_faults = [fault_id for fault_id, fault in self.faults.items() if fault.is_resolved]
         for fault_id in resolved_faults:
             del self.faults[fault_id]
+        self._prune_dedup()
         logger.info(f"✅ 清除已解决故障: {len(resolved_faults)}个")
     
+    def _prune_dedup(self):
+        """清理过期或已失效的去重缓存条目"""
+        now = time.time()
+        stale = [
+            key for key, (fault_id, first_seen) in self._dedup.items()
+            if now - first_seen >= self._dedup_ttl or fault_id not in self.faults
+        ]
+        for key in stale:
+            del self._dedup[key]
+    
     def reset_stats(self):
         """重置统计信息"""
         self.fault_stats = {
             "total_faults": 0,
             "resolved_faults": 0,
             "critical_faults": 0,
-            "faults_by_type": {},
-            "faults_by_severity": {}
+            "faults_by_type": Counter(),
+            "faults_by_severity": Counter()
         }
         logger.info("🔄 故障统计信息已重置")
+    
+    def shutdown(self):
+        """停止异步日志监听线程并写出队列中剩余的日志"""
+        disable_async_logging()
 
 
 # 故障处理装饰器
@@ -350,21 +726,26 @@ def fault_tolerant(module_name: str, fault_type: FaultType = FaultType.SOFTWARE,
         severity: 故障严重程度
     """
     def decorator(func):
+        func_name = func.__name__
+        
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
-            fault_handler = FaultHandler()
             try:
                 return await func(*args, **kwargs)
             except Exception as e:
-                fault_id = fault_handler.handle_fault(
+                # 共用全局故障处理器，避免每次调用都构造新实例
+                fault_id = global_fault_handler.handle_fault(
                     fault_type=fault_type,
                     severity=severity,
                     module_name=module_name,
                     error_message=str(e),
                     error_code=type(e).__name__,
-                    context={"function": func.__name__, "args": str(args), "kwargs": str(kwargs)}
+                    # 保存截断后的参数repr：不持有参数对象引用，也不对大数组等参数做完整的字符串化
+                    context={"function": func_name,
+                             "args": _CONTEXT_REPR.repr(args),
+                             "kwargs": _CONTEXT_REPR.repr(kwargs)}
                 )
-                logger.error(f"❌ 函数 {func.__name__} 执行失败，故障ID: {fault_id}")
+                logger.error(f"❌ 函数 {func_name} 执行失败，故障ID: {fault_id}")
                 return None
         return wrapper
     return decorator
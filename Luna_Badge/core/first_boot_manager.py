@@ -2,6 +2,7 @@
 模块2：首次开机流程（新建/继承账号）
 实现文件：core/first_boot_manager.py
 """
+import copy
 import os
 import time
 import json
@@ -19,6 +20,8 @@ class FirstBootManager:
     
     def __init__(self, flag_path="data/initialized.flag"):
         self.flag_path = flag_path
+        # 标志文件是否存在的缓存（None表示尚未检测）
+        self._initialized: Optional[bool] = None
         self.ensure_data_dir()
     
     def ensure_data_dir(self):
@@ -32,13 +35,16 @@ class FirstBootManager:
         Returns:
             True表示首次开机，False表示已初始化
         """
-        return not os.path.exists(self.flag_path)
+        if self._initialized is None:
+            self._initialized = os.path.exists(self.flag_path)
+        return not self._initialized
     
     def mark_device_initialized(self):
         """标记设备已初始化，防止重复引导"""
         try:
             with open(self.flag_path, 'w', encoding='utf-8') as f:
                 f.write(f"initialized_at: {datetime.now().isoformat()}\n")
+            self._initialized = True
             return True
         except Exception as e:
             print(f"标记初始化失败: {e}")
@@ -51,7 +57,7 @@ class FirstBootManager:
         Returns:
             初始化时间字符串，如果未初始化则返回None
         """
-        if not os.path.exists(self.flag_path):
+        if self.first_boot_check():
             return None
         
         try:
@@ -74,8 +80,13 @@ class AccountSetupFlow:
     支持语音引导配网/扫码配对等机制
     """
     
-    def __init__(self, account_path="data/user_profile.json"):
+    def __init__(self, account_path="data/user_profile.json", whisper=None):
         self.account_path = account_path
+        # Whisper识别器，首次使用语音输入时才加载，之后一直复用
+        self._whisper = whisper
+        # 已解析的账号信息及对应文件修改时间，文件未变化时直接复用
+        self._cache: Optional[dict] = None
+        self._cache_mtime: Optional[int] = None
         self.ensure_data_dir()
     
     def ensure_data_dir(self):
@@ -102,8 +113,7 @@ class AccountSetupFlow:
             print("等待语音输入...")
             
             # 使用Whisper识别
-            whisper = get_whisper_recognizer(model_name="base")
-            user_input, _ = whisper.recognize_from_microphone(duration=5)
+            user_input, _ = self._get_whisper().recognize_from_microphone(duration=5)
             print(f"您说的是: {user_input}")
         else:
             print("请选择：")
@@ -145,6 +155,7 @@ class AccountSetupFlow:
             # 保存账号信息
             with open(self.account_path, 'w', encoding='utf-8') as f:
                 json.dump(account_data, f, indent=2, ensure_ascii=False)
+            self._invalidate_cache()
             
             return account_id
         except Exception as e:
@@ -158,8 +169,7 @@ class AccountSetupFlow:
             print("等待语音输入...")
             
             # 使用Whisper识别
-            whisper = get_whisper_recognizer(model_name="base")
-            account_id, _ = whisper.recognize_from_microphone(duration=5)
+            account_id, _ = self._get_whisper().recognize_from_microphone(duration=5)
             print(f"您说的是: {account_id}")
         else:
             account_id = input("请输入原账号ID：")
@@ -179,6 +189,7 @@ class AccountSetupFlow:
         try:
             with open(self.account_path, 'w', encoding='utf-8') as f:
                 json.dump(account_data, f, indent=2, ensure_ascii=False)
+            self._invalidate_cache()
             
             return account_id
         except Exception as e:
@@ -188,26 +199,45 @@ class AccountSetupFlow:
     def _wait_for_voice_input(self) -> str:
         """等待语音输入（保留兼容接口）"""
         # 已经集成了Whisper，此方法保留为兼容接口
-        whisper = get_whisper_recognizer(model_name="base")
-        text, _ = whisper.recognize_from_microphone(duration=5)
+        text, _ = self._get_whisper().recognize_from_microphone(duration=5)
         return text
     
+    def _get_whisper(self):
+        """获取Whisper识别器（首次调用时加载模型）"""
+        if self._whisper is None:
+            self._whisper = get_whisper_recognizer(model_name="base")
+        return self._whisper
+    
     def load_account_info(self) -> Optional[dict]:
         """
         加载当前账号信息
         
         Returns:
-            账号信息字典，如果未登录则返回None
+            账号信息字典（缓存的深复制，调用方可以自由修改），如果未登录则返回None
         """
-        if not os.path.exists(self.account_path):
+        try:
+            mtime = os.stat(self.account_path).st_mtime_ns
+        except OSError:
+            self._invalidate_cache()
             return None
         
+        if self._cache is not None and mtime == self._cache_mtime:
+            return copy.deepcopy(self._cache)
+        
         try:
             with open(self.account_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                self._cache = json.load(f)
+            self._cache_mtime = mtime
+            return copy.deepcopy(self._cache)
         except Exception as e:
             print(f"加载账号信息失败: {e}")
+            self._invalidate_cache()
             return None
+    
+    def _invalidate_cache(self):
+        """清除账号信息缓存（写入账号文件后调用）"""
+        self._cache = None
+        self._cache_mtime = None
 
 
 # 集成函数
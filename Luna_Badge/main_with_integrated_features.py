@@ -12,7 +12,7 @@ import time
 import numpy as np
 from typing import Optional, Dict, Any, List
 
-from core.fault_handler import FaultHandler, FaultType, FaultSeverity, handle_fault
+from core.fault_handler import FaultHandler, FaultType, FaultSeverity, handle_fault, enable_async_logging
 from core.log_manager import LogManager, LogLevel, EventType, log_voice_broadcast, log_path_status, log_ai_detection
 from core.visual_display import VisualDisplayManager, DetectionBox, PathRegion, PathStatus, update_display
 from core.startup_manager import StartupManager, StartupStage
@@ -22,6 +22,8 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+# 日志写入交给后台线程，避免阻塞事件循环
+enable_async_logging()
 
 logger = logging.getLogger(__name__)
 